@@ -1,15 +1,13 @@
 # __init__.py (Root of Project)
 
-import boto3
-import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Initialize Bedrock Client and Make It Globally Available
-bedrock_client = boto3.client(
-    'bedrock-runtime',
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    region_name="us-east-1"
-)
+def __getattr__(name):
+    # The shared Bedrock client is created on first access rather than at import,
+    # so importing the package stays cheap (see settings.yaml: clients.bedrock)
+    if name == "bedrock_client":
+        from .app.core.clients import get_bedrock_client
+        return get_bedrock_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
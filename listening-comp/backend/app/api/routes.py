@@ -1,25 +1,70 @@
 from fastapi import APIRouter, HTTPException, Request, Depends, Query
-from typing import Dict, Any
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, Iterator, List, Optional
+import json
 import os
 
 from ..services.chat import BedrockChat
-from ..services.youtube import YouTubeTranscriptDownloader
-from ..services.text_extractor import TextPatternExtractor
-from ..services.vector_store import QuestionVectorStore
-from ..utils.file_handlers import process_and_save_questions, save_transcript
+from ..services.jobs import JobManager
+from ..core.clients import client_status
+from ..core.config import DATA_DIR, settings
+from ..core.lazy import lazy_singleton
 
 router = APIRouter()
 
-# Initialize services
+# Upper bound for n_results of the similar-question endpoints
+MAX_SIMILAR_RESULTS = 100
+
+# Services are created on first use (and run in FastAPI's threadpool as sync
+# dependencies), so importing this module does not pull in chromadb or boto3
+# and a fresh worker can answer /healthz right away.
+@lazy_singleton
 def get_bedrock_chat():
+    """Shared chat service, so its response cache outlives a single request"""
     return BedrockChat()
 
-# Initialize vector store
-vector_store = QuestionVectorStore(persist_directory=os.path.join(
-    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-    "data",
-    "chroma_db"
-))
+@lazy_singleton
+def get_vector_store():
+    """Vector store singleton (reopens the persisted collection)"""
+    from ..services.vector_store import QuestionVectorStore
+    return QuestionVectorStore(persist_directory=os.path.join(DATA_DIR, "chroma_db"))
+
+@lazy_singleton
+def get_job_manager():
+    """Background workers for ingestion jobs"""
+    return JobManager(
+        max_workers=settings["jobs"]["max_workers"],
+        max_retained=settings["jobs"]["max_retained"]
+    )
+
+@lazy_singleton
+def get_ingestion_pipeline():
+    from ..services.ingestion import TranscriptIngestionPipeline
+    return TranscriptIngestionPipeline(get_vector_store())
+
+@lazy_singleton
+def get_batch_ingestor():
+    from ..services.batch_ingest import BatchIngestor
+    return BatchIngestor(get_ingestion_pipeline(), **settings["batch_ingest"])
+
+SERVICES = {
+    "vector_store": get_vector_store,
+    "job_manager": get_job_manager,
+    "ingestion_pipeline": get_ingestion_pipeline,
+    "batch_ingestor": get_batch_ingestor,
+}
+
+@router.get("/healthz")
+async def healthz() -> Dict[str, Any]:
+    """Liveness check that never initializes any service"""
+    return {
+        "status": "ok",
+        "initialized": {
+            **{name: getter.peek() is not None for name, getter in SERVICES.items()},
+            **client_status()
+        }
+    }
 
 @router.post("/invoke-llm")
 async def invoke_llm(request: Request, chat: BedrockChat = Depends(get_bedrock_chat)) -> Dict[str, Any]:
@@ -28,61 +73,58 @@ async def invoke_llm(request: Request, chat: BedrockChat = Depends(get_bedrock_c
         data = await request.json()
         message = data.get("message")
         inference_config = data.get("inference_config")
+        use_cache = data.get("use_cache")
         
         if not message:
             raise HTTPException(status_code=400, detail="Message is required")
             
-        response = chat.generate_response(message, inference_config)
+        response = await run_in_threadpool(chat.generate_response, message, inference_config, use_cache)
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def sse_events(chunks: Iterator[str]) -> Iterator[str]:
+    """Wrap text chunks as Server-Sent Events, ending with a done (or error) event"""
+    try:
+        for chunk in chunks:
+            yield f"data: {json.dumps({'text': chunk}, ensure_ascii=False)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+@router.post("/invoke-llm/stream")
+async def invoke_llm_stream(request: Request, chat: BedrockChat = Depends(get_bedrock_chat)) -> StreamingResponse:
+    """API endpoint to stream a response from Amazon Bedrock as Server-Sent Events"""
+    data = await request.json()
+    message = data.get("message")
+    inference_config = data.get("inference_config")
+    use_cache = data.get("use_cache")
+
+    if not message:
+        raise HTTPException(status_code=400, detail="Message is required")
+
+    # The sync generator is iterated in a worker thread by Starlette
+    return StreamingResponse(
+        sse_events(chat.stream_response(message, inference_config, use_cache)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/get-transcript")
-async def get_transcript(video_url: str = Query(..., description="YouTube video URL")) -> Dict[str, Any]:
+async def get_transcript(
+    video_url: str = Query(..., description="YouTube video URL"),
+    force_refresh: bool = Query(False, description="Fetch the transcript again even if it is cached"),
+    streaming: Optional[bool] = Query(None, description="Index questions while the LLM streams them"),
+    ingestion_pipeline=Depends(get_ingestion_pipeline)
+) -> Dict[str, Any]:
     """API Endpoint to get the transcript of a YouTube video."""
     try:
-        # Initialize downloader
-        downloader = YouTubeTranscriptDownloader()
-        
-        # Extract video ID
-        video_id = downloader.extract_video_id(video_url)
-        print(f"Processing video: {video_id}")
-        
-        # Get transcript
-        transcript = downloader.get_transcript(video_id)
-        print(f"Got transcript with {len(transcript)} entries")
-        
-        # Save transcript
-        save_success = save_transcript(transcript, video_id)
-        if not save_success:
-            raise HTTPException(status_code=500, detail="Failed to save transcript")
-            
-        # Process text with LLM
-        combined_text = ' '.join(entry['text'] for entry in transcript)
-        print(f"Combined transcript length: {len(combined_text)} chars")
-        
-        # Initialize text extractor
-        extractor = TextPatternExtractor()
-        
-        # Process with Nova LLM
-        processed_text = extractor.invoke_llm(combined_text, "nova-micro")
-        print(f"Processed text from LLM: {processed_text[:200]}...")  # Print first 200 chars
-        
-        # Save processed questions
-        questions_file = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "questions", f"{video_id}.txt")
-        processed_text = process_and_save_questions(processed_text, questions_file)
-        
-        # Add to vector store
-        success = vector_store.add_questions(processed_text, video_id)
-        if not success:
-            print("Failed to add questions to vector store")
-        else:
-            print("Successfully added questions to vector store")
-        
+        # Run the blocking pipeline off the event loop so other requests keep being served
+        result = await run_in_threadpool(ingestion_pipeline.run, video_url, None, force_refresh, streaming)
         return {
-            "video_id": video_id,
-            "transcript": transcript,
-            "processed_text": processed_text
+            "video_id": result["video_id"],
+            "transcript": result["transcript"],
+            "processed_text": result["processed_text"]
         }
         
     except ValueError as e:
@@ -90,38 +132,234 @@ async def get_transcript(video_url: str = Query(..., description="YouTube video
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/ingest/jobs")
+async def create_ingest_job(
+    video_url: str = Query(..., description="YouTube video URL"),
+    force_refresh: bool = Query(False, description="Fetch the transcript again even if it is cached"),
+    streaming: Optional[bool] = Query(None, description="Index questions while the LLM streams them"),
+    ingestion_pipeline=Depends(get_ingestion_pipeline),
+    job_manager=Depends(get_job_manager)
+) -> Dict[str, Any]:
+    """API endpoint to queue a video for background ingestion; returns a job id immediately"""
+    try:
+        # Validate the URL up front so bad input fails fast instead of as a failed job
+        ingestion_pipeline.downloader.extract_video_id(video_url)
+        job = job_manager.submit(
+            "ingest_video",
+            ingestion_pipeline.STAGES,
+            lambda job: ingestion_pipeline.run(video_url, job, force_refresh, streaming),
+            params={"video_url": video_url, "force_refresh": force_refresh, "streaming": streaming}
+        )
+        return job.to_dict()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/ingest/batch")
+async def create_batch_ingest_job(
+    request: Request,
+    job_manager=Depends(get_job_manager),
+    batch_ingestor=Depends(get_batch_ingestor)
+) -> Dict[str, Any]:
+    """API endpoint to queue a batch of videos (URLs or ids) for pipelined ingestion"""
+    data = await request.json()
+    videos = data.get("videos", [])
+    if not videos:
+        raise HTTPException(status_code=400, detail="No videos provided")
+    force = bool(data.get("force", False))
+    force_refresh = bool(data.get("force_refresh", False))
+
+    job = job_manager.submit(
+        "ingest_batch",
+        batch_ingestor.STAGES,
+        lambda job: batch_ingestor.run(videos, force=force, force_refresh=force_refresh, job=job),
+        params={"videos": len(videos), "force": force, "force_refresh": force_refresh}
+    )
+    return job.to_dict()
+
+@router.get("/ingest/jobs")
+async def list_ingest_jobs(job_manager=Depends(get_job_manager)) -> Dict[str, Any]:
+    """API endpoint to list known ingestion jobs"""
+    return {"jobs": [job.to_dict() for job in job_manager.list()]}
+
+@router.get("/ingest/jobs/{job_id}")
+async def get_ingest_job(job_id: str, job_manager=Depends(get_job_manager)) -> Dict[str, Any]:
+    """API endpoint to get the status and per-stage progress of an ingestion job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.get("/ingest/jobs/{job_id}/result")
+async def get_ingest_job_result(job_id: str, job_manager=Depends(get_job_manager)) -> Dict[str, Any]:
+    """API endpoint to get the result of a finished ingestion job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return job.result
+
 @router.get("/api/similar-questions")
 async def get_similar_questions(
     query: str = Query(..., description="Question or text to find similar questions for"),
-    n_results: int = Query(5, description="Number of similar questions to return")
+    n_results: int = Query(5, ge=1, le=MAX_SIMILAR_RESULTS, description="Number of similar questions to return"),
+    mode: str = Query("vector", description="vector or hybrid (vector + keyword with rank fusion)"),
+    video_id: Optional[str] = Query(None, description="Only search questions from this video"),
+    topic: Optional[str] = Query(None, description="Only search manually added questions with this topic"),
+    vector_store=Depends(get_vector_store)
 ) -> Dict[str, Any]:
     """API endpoint to find similar questions in the vector store"""
+    filters = {"video_id": video_id, "topic": topic}
+    if mode not in ("vector", "hybrid"):
+        raise HTTPException(status_code=400, detail=f"Unsupported mode: {mode}")
     try:
-        similar_questions = vector_store.find_similar_questions(query, n_results)
+        if mode == "hybrid":
+            similar_questions = await run_in_threadpool(
+                vector_store.find_similar_questions_hybrid, query, n_results, filters
+            )
+        else:
+            similar_questions = await run_in_threadpool(
+                vector_store.find_similar_questions, query, n_results, filters
+            )
         return {"questions": similar_questions}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/search-questions")
+async def search_questions(
+    q: str = Query(..., min_length=1, description="Text to look for, e.g. a Japanese word"),
+    limit: int = Query(20, ge=1, le=200, description="Maximum number of questions to return"),
+    video_id: Optional[str] = Query(None, description="Only search questions from this video"),
+    vector_store=Depends(get_vector_store)
+) -> Dict[str, Any]:
+    """API endpoint for local substring search over question text (no embedding call)"""
+    try:
+        return {"questions": await run_in_threadpool(vector_store.search_questions, q, limit, video_id)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/api/similar-questions/batch")
+async def get_similar_questions_batch(request: Request, vector_store=Depends(get_vector_store)) -> Dict[str, Any]:
+    """API endpoint to find similar questions for several queries in one round trip"""
+    try:
+        data = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be JSON")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    queries = data.get("queries", [])
+    if not isinstance(queries, list) or not queries or not all(isinstance(query, str) and query for query in queries):
+        raise HTTPException(status_code=400, detail="queries must be a non-empty list of strings")
+    n_results = data.get("n_results", 5)
+    if isinstance(n_results, bool) or not isinstance(n_results, int) or not 1 <= n_results <= MAX_SIMILAR_RESULTS:
+        raise HTTPException(status_code=400, detail=f"n_results must be an integer from 1 to {MAX_SIMILAR_RESULTS}")
+    filters = data.get("filters")
+    if filters is not None and not isinstance(filters, dict):
+        raise HTTPException(status_code=400, detail="filters must be an object")
+
+    try:
+        # Unknown filter fields raise ValueError before anything is embedded
+        vector_store.build_where(filters)
+        grouped = await run_in_threadpool(
+            vector_store.find_similar_questions_batch, queries, n_results, filters
+        )
+        return {
+            "results": [
+                {"query": query, "questions": questions}
+                for query, questions in zip(queries, grouped)
+            ]
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a comma separated field projection, e.g. "id,metadata" """
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
 @router.get("/api/all-questions")
-async def get_all_questions() -> Dict[str, Any]:
-    """API endpoint to get all questions from the vector store"""
+async def get_all_questions(
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of questions per page"),
+    offset: int = Query(0, ge=0, description="Number of questions to skip; next_offset from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma separated subset of id,text,metadata"),
+    video_id: Optional[str] = Query(None, description="Only return questions from this video"),
+    vector_store=Depends(get_vector_store)
+) -> Dict[str, Any]:
+    """API endpoint to get a page of questions from the vector store"""
     try:
-        all_questions = vector_store.get_all_questions()
-        return {"questions": all_questions}
+        page = await run_in_threadpool(
+            vector_store.get_questions_page, limit, offset, parse_fields(fields), video_id
+        )
+        return {"questions": page["questions"], "next_offset": page["next_offset"]}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/api/all-questions/stream")
+async def stream_all_questions(
+    fields: Optional[str] = Query(None, description="Comma separated subset of id,text,metadata"),
+    video_id: Optional[str] = Query(None, description="Only return questions from this video"),
+    vector_store=Depends(get_vector_store)
+) -> StreamingResponse:
+    """API endpoint to stream all questions as NDJSON, one question per line"""
+    projection = parse_fields(fields)
+    try:
+        # Validate the projection before the response starts
+        vector_store.get_questions_page(1, 0, projection, video_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def lines() -> Iterator[str]:
+        for question in vector_store.iter_questions(fields=projection, video_id=video_id):
+            yield json.dumps(question, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @router.delete("/api/clear-questions")
-async def clear_questions() -> Dict[str, Any]:
+async def clear_questions(vector_store=Depends(get_vector_store)) -> Dict[str, Any]:
     """API endpoint to clear all questions from the vector store"""
     try:
-        vector_store.clear_questions()
+        await run_in_threadpool(vector_store.clear_questions)
         return {"success": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/api/cache-stats")
+async def get_cache_stats(
+    ingestion_pipeline=Depends(get_ingestion_pipeline),
+    chat: BedrockChat = Depends(get_bedrock_chat)
+) -> Dict[str, Any]:
+    """API endpoint to get hit/miss counters of the backend caches"""
+    cache = ingestion_pipeline.structuring_cache
+    return {
+        "structuring": cache.stats() if cache else None,
+        "chat": chat.cache.stats() if chat.cache else None
+    }
+
+@router.post("/api/rebuild-index")
+async def rebuild_index(
+    reingest: bool = Query(True, description="Re-ingest saved question files"),
+    vector_store=Depends(get_vector_store)
+) -> Dict[str, Any]:
+    """API endpoint to recreate the vector store collection"""
+    try:
+        questions_dir = os.path.join(DATA_DIR, "questions") if reingest else None
+        # Re-parses and re-embeds every saved file: keep it off the event loop
+        videos = await run_in_threadpool(vector_store.rebuild, questions_dir)
+        return {"success": True, "videos_reingested": videos}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/api/add-questions")
-async def add_questions(request: Request) -> Dict[str, Any]:
+async def add_questions(request: Request, vector_store=Depends(get_vector_store)) -> Dict[str, Any]:
     """API endpoint to add questions to the vector store"""
     try:
         data = await request.json()
@@ -130,11 +368,11 @@ async def add_questions(request: Request) -> Dict[str, Any]:
             raise HTTPException(status_code=400, detail="No questions provided")
         
         for question in questions:
-            vector_store.add_question(
-                question["text"],
-                question["answer"],
-                question.get("topic", "general")
-            )
+            if "text" not in question or "answer" not in question:
+                raise HTTPException(status_code=400, detail="Each question needs text and answer")
+        await run_in_threadpool(vector_store.add_questions_bulk, questions)
         return {"status": "success", "message": f"Added {len(questions)} questions"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
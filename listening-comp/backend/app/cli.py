@@ -0,0 +1,76 @@
+"""
+Command line maintenance tasks for the listening comprehension backend.
+
+Run from the listening-comp directory, e.g.:
+    python -m backend.app.cli rebuild-index
+    python -m backend.app.cli ingest-batch --file videos.txt
+"""
+import argparse
+import os
+
+from .core.config import DATA_DIR
+
+def rebuild_index(args: argparse.Namespace) -> None:
+    """Recreate the vector store collection and re-ingest saved questions"""
+    from .services.vector_store import QuestionVectorStore
+
+    vector_store = QuestionVectorStore(persist_directory=os.path.join(DATA_DIR, "chroma_db"))
+    questions_dir = None if args.empty else os.path.join(DATA_DIR, "questions")
+    videos = vector_store.rebuild(questions_dir)
+    print(f"Index rebuilt: {videos} videos, {vector_store.collection.count()} questions")
+
+def ingest_batch(args: argparse.Namespace) -> None:
+    """Ingest many videos, pipelining fetch, structuring and indexing"""
+    import json
+    from .core.config import settings
+    from .services.vector_store import QuestionVectorStore
+    from .services.ingestion import TranscriptIngestionPipeline
+    from .services.batch_ingest import BatchIngestor
+
+    videos = list(args.videos)
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            videos.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    if not videos:
+        raise SystemExit("No videos given")
+
+    batch_settings = dict(settings["batch_ingest"])
+    if args.fetch_workers:
+        batch_settings["fetch_workers"] = args.fetch_workers
+    if args.structure_workers:
+        batch_settings["structure_workers"] = args.structure_workers
+    if args.index_workers:
+        batch_settings["index_workers"] = args.index_workers
+
+    vector_store = QuestionVectorStore(persist_directory=os.path.join(DATA_DIR, "chroma_db"))
+    ingestor = BatchIngestor(TranscriptIngestionPipeline(vector_store), **batch_settings)
+    result = ingestor.run(videos, force=args.force, force_refresh=args.force_refresh)
+    print(json.dumps(result["summary"]))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Listening comprehension backend tasks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser("rebuild-index", help="Recreate the question vector store")
+    rebuild.add_argument(
+        "--empty",
+        action="store_true",
+        help="Only recreate the collection, do not re-ingest data/questions"
+    )
+    rebuild.set_defaults(func=rebuild_index)
+
+    batch = subparsers.add_parser("ingest-batch", help="Ingest many YouTube videos")
+    batch.add_argument("videos", nargs="*", help="YouTube URLs or video ids")
+    batch.add_argument("--file", help="File with one URL or video id per line")
+    batch.add_argument("--force", action="store_true", help="Re-ingest videos already in the store")
+    batch.add_argument("--force-refresh", action="store_true", help="Ignore cached transcripts")
+    batch.add_argument("--fetch-workers", type=int, help="Concurrent transcript fetches")
+    batch.add_argument("--structure-workers", type=int, help="Concurrent LLM structuring calls")
+    batch.add_argument("--index-workers", type=int, help="Concurrent embedding and collection writes")
+    batch.set_defaults(func=ingest_batch)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import os
+
+from .config import settings
+from .lazy import lazy_singleton
+
+CLIENT_SETTINGS = settings["clients"]
+
+# boto3 and openai are imported on first use: importing them costs more than the
+# rest of the app's startup, and workers that only serve health checks never need them
+
+def bedrock_config():
+    """
+    botocore config for the shared Bedrock client.
+
+    The connection pool is sized for the thread pools that call Bedrock in parallel
+    (embedding, chunked structuring, chat), TCP keep-alive keeps idle connections
+    reusable, and adaptive retries back off client-side when Bedrock throttles.
+    """
+    from botocore.config import Config
+
+    bedrock = CLIENT_SETTINGS["bedrock"]
+    return Config(
+        region_name=bedrock["region"],
+        max_pool_connections=bedrock["max_pool_connections"],
+        connect_timeout=bedrock["connect_timeout"],
+        read_timeout=bedrock["read_timeout"],
+        tcp_keepalive=bedrock["tcp_keepalive"],
+        retries={
+            "mode": bedrock["retry_mode"],
+            "max_attempts": bedrock["max_attempts"],
+        }
+    )
+
+def create_bedrock_client():
+    """Create a new bedrock-runtime client; prefer the shared get_bedrock_client()"""
+    import boto3
+
+    return boto3.client(
+        'bedrock-runtime',
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        config=bedrock_config()
+    )
+
+@lazy_singleton
+def get_bedrock_client():
+    """Return the shared bedrock-runtime client, creating it on first use"""
+    return create_bedrock_client()
+
+@lazy_singleton
+def get_openai_client():
+    """
+    Return the shared OpenAI client, creating it on first use.
+
+    One client means one httpx connection pool, so repeated calls reuse TLS
+    connections instead of opening a new one per request.
+    """
+    import httpx
+    from openai import OpenAI
+
+    openai_settings = CLIENT_SETTINGS["openai"]
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=openai_settings["max_connections"],
+            max_keepalive_connections=openai_settings["max_keepalive_connections"],
+            keepalive_expiry=openai_settings["keepalive_expiry"]
+        ),
+        timeout=httpx.Timeout(
+            openai_settings["read_timeout"],
+            connect=openai_settings["connect_timeout"]
+        )
+    )
+    return OpenAI(
+        api_key=os.getenv('OPENAI_API_KEY'),
+        http_client=http_client,
+        max_retries=openai_settings["max_retries"]
+    )
+
+CLIENTS = {
+    "bedrock": get_bedrock_client,
+    "openai": get_openai_client,
+}
+
+def client_status() -> dict:
+    """Which shared clients have been created so far"""
+    return {name: getter.peek() is not None for name, getter in CLIENTS.items()}
@@ -13,3 +13,7 @@ def load_settings(file_path: str) -> dict:
 
 # Load settings from YAML file
 settings = load_settings("backend/settings.yaml")
+
+# Generated data (transcripts, questions, vector store) lives under backend/data
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATA_DIR = os.path.join(BACKEND_DIR, "data")
@@ -0,0 +1,31 @@
+import functools
+import threading
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+def lazy_singleton(factory: Callable[[], T]) -> Callable[[], T]:
+    """
+    Turn a zero-argument factory into a getter that builds the object on first
+    call and returns the same instance afterwards.
+
+    Construction happens at most once even when several threads ask at the same
+    time. The getter also has peek(), which returns the instance or None without
+    creating it, for shutdown hooks and health checks.
+    """
+    lock = threading.Lock()
+    instance: list = []
+
+    @functools.wraps(factory)
+    def get() -> T:
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+
+    def peek() -> Optional[T]:
+        return instance[0] if instance else None
+
+    get.peek = peek
+    return get
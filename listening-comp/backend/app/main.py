@@ -1,11 +1,38 @@
+from contextlib import asynccontextmanager
+import threading
+
 from fastapi import FastAPI
-from .api.routes import router
+from .api.routes import router, SERVICES, get_job_manager, get_vector_store
+from .core.config import settings
+
+def preload_services() -> None:
+    """Build the lazily created services so the first real request does not pay for it"""
+    for name, getter in SERVICES.items():
+        try:
+            getter()
+        except Exception as e:
+            print(f"Preloading {name} failed: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup stays cheap: services are built on first use, or in the background
+    # when startup.preload is set, so /healthz answers before they are ready
+    if settings["startup"]["preload"]:
+        threading.Thread(target=preload_services, name="preload", daemon=True).start()
+    yield
+    job_manager = get_job_manager.peek()
+    if job_manager:
+        job_manager.shutdown()
+    vector_store = get_vector_store.peek()
+    if vector_store:
+        vector_store.ngram_index.close()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Listening Comprehension API",
     description="API for processing YouTube transcripts and generating structured questions",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Include routers
@@ -1,4 +1,4 @@
-# Import bedrock client to make it available to other modules
-from backend import bedrock_client
+# The Bedrock client is shared and created lazily on first use
+from ..core.clients import get_bedrock_client
 
-__all__ = ['bedrock_client']
+__all__ = ['get_bedrock_client']
@@ -0,0 +1,185 @@
+import re
+import time
+from contextlib import ExitStack
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+from .ingestion import TranscriptIngestionPipeline
+from .jobs import Job
+
+VIDEO_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+class BatchIngestor:
+    """
+    Ingests many videos by pipelining the stages across videos.
+
+    Transcript fetching, LLM structuring and indexing run on separate worker pools
+    with their own concurrency limits, so fetches for later videos overlap
+    structuring of earlier ones, and both overlap embedding and writing of finished
+    ones. Parsed questions are buffered and written with one collection add per flush.
+    """
+
+    STAGES = ["fetch_transcript", "structure", "index"]
+
+    def __init__(
+        self,
+        pipeline: TranscriptIngestionPipeline,
+        fetch_workers: int = 8,
+        structure_workers: int = 4,
+        index_workers: int = 1,
+        flush_size: int = 200
+    ):
+        self.pipeline = pipeline
+        self.vector_store = pipeline.vector_store
+        self.fetch_workers = fetch_workers
+        self.structure_workers = structure_workers
+        self.index_workers = index_workers
+        self.flush_size = flush_size
+
+    def resolve_video_id(self, video: str) -> str:
+        """Accept either a bare video id or a YouTube URL"""
+        video = video.strip()
+        if VIDEO_ID_PATTERN.match(video):
+            return video
+        return self.pipeline.downloader.extract_video_id(video)
+
+    def _structure(self, video_id: str, transcript: List[Dict]) -> Dict[str, Any]:
+        structured = self.pipeline.structure(video_id, transcript)
+        structured["questions"] = self.vector_store.parse_question_xml(structured["processed_text"])
+        return structured
+
+    def run(
+        self,
+        videos: List[str],
+        force: bool = False,
+        force_refresh: bool = False,
+        job: Optional[Job] = None
+    ) -> Dict[str, Any]:
+        """
+        Ingest a list of video URLs or ids.
+
+        Args:
+            videos: YouTube URLs or video ids; duplicates are ignored
+            force: Re-ingest videos that are already in the vector store
+            force_refresh: Fetch transcripts again even if they are cached
+            job: Optional job to report per-stage progress to
+
+        Returns:
+            dict: Per-video status and overall counts
+        """
+        start = time.perf_counter()
+        results: Dict[str, Dict[str, Any]] = {}
+        video_ids: List[str] = []
+        for video in videos:
+            try:
+                video_id = self.resolve_video_id(video)
+            except ValueError as e:
+                results[video] = {"status": "failed", "error": str(e)}
+                continue
+            if video_id in results:
+                continue
+            if not force and self.vector_store.has_video(video_id):
+                results[video_id] = {"status": "skipped", "reason": "already ingested"}
+                continue
+            results[video_id] = {"status": "queued"}
+            video_ids.append(video_id)
+
+        print(f"Batch ingest: {len(video_ids)} videos to process, {len(results) - len(video_ids)} skipped or invalid")
+        counts = {"fetched": 0, "structured": 0, "indexed": 0}
+
+        def report():
+            if job:
+                job.set_stage_detail("fetch_transcript", {"done": counts["fetched"], "total": len(video_ids)})
+                job.set_stage_detail("structure", {"done": counts["structured"], "total": len(video_ids)})
+                job.set_stage_detail("index", {"done": counts["indexed"], "total": len(video_ids)})
+
+        buffer: List[Dict[str, Any]] = []
+        buffered_questions = 0
+
+        def indexed(video_ids: List[str], success: bool, error: str = "Failed to add questions to vector store"):
+            for video_id in video_ids:
+                results[video_id]["status"] = "indexed" if success else "failed"
+                if success:
+                    counts["indexed"] += 1
+                else:
+                    results[video_id].update(stage="index", error=error)
+
+        with ExitStack() as stack:
+            # The stages overlap, so they are all running for the whole batch
+            if job:
+                for stage in self.STAGES:
+                    stack.enter_context(job.stage(stage))
+            fetch_pool = stack.enter_context(ThreadPoolExecutor(self.fetch_workers, thread_name_prefix="fetch"))
+            structure_pool = stack.enter_context(
+                ThreadPoolExecutor(self.structure_workers, thread_name_prefix="structure")
+            )
+            # Embedding and the collection write of a flush run here, not on this loop,
+            # so finished fetches keep being handed to the structure pool meanwhile
+            index_pool = stack.enter_context(ThreadPoolExecutor(self.index_workers, thread_name_prefix="index"))
+            stage_of = {}
+            for video_id in video_ids:
+                future = fetch_pool.submit(self.pipeline.fetch_transcript, video_id, force_refresh)
+                stage_of[future] = ("fetch", video_id)
+            pending = set(stage_of)
+
+            def flush():
+                nonlocal buffer, buffered_questions
+                if not buffer:
+                    return
+                future = index_pool.submit(self.vector_store.add_parsed_questions, buffer)
+                stage_of[future] = ("index", [video["video_id"] for video in buffer])
+                pending.add(future)
+                buffer, buffered_questions = [], 0
+
+            while pending or buffer:
+                if not pending:
+                    # Nothing else in flight: write what is left
+                    flush()
+                    continue
+                done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+                pending.intersection_update(not_done)
+                for future in done:
+                    stage, video_id = stage_of.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"Batch ingest: {stage} failed for {video_id}: {str(e)}")
+                        if stage == "index":
+                            indexed(video_id, False, str(e))
+                        else:
+                            results[video_id] = {"status": "failed", "stage": stage, "error": str(e)}
+                        continue
+
+                    if stage == "index":
+                        indexed(video_id, result)
+                    elif stage == "fetch":
+                        counts["fetched"] += 1
+                        next_future = structure_pool.submit(self._structure, video_id, result)
+                        stage_of[next_future] = ("structure", video_id)
+                        pending.add(next_future)
+                    else:
+                        counts["structured"] += 1
+                        results[video_id] = {
+                            "status": "structured",
+                            "questions": len(result["questions"]),
+                            "cached": result["cached"]
+                        }
+                        if result["questions"]:
+                            buffer.append({
+                                "video_id": video_id,
+                                "questions": result["questions"],
+                                "source_hash": result["cache_key"]
+                            })
+                            buffered_questions += len(result["questions"])
+                        else:
+                            results[video_id].update(status="failed", error="No questions parsed")
+                        if buffered_questions >= self.flush_size:
+                            flush()
+                report()
+
+        summary = {}
+        for result in results.values():
+            summary[result["status"]] = summary.get(result["status"], 0) + 1
+        elapsed = time.perf_counter() - start
+        print(f"Batch ingest finished in {elapsed:.1f}s: {summary}")
+        return {"videos": results, "summary": summary, "elapsed_seconds": elapsed}
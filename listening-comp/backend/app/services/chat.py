@@ -1,24 +1,53 @@
-from typing import Dict, Any, Optional
-from . import bedrock_client
+from typing import Dict, Any, Optional, Iterator
+from . import get_bedrock_client
+from .response_cache import ResponseCache
 from ..core.config import settings
 
 MODEL_ID = settings["aws_bedrock"]["text_structurer"]["model_id"]
 
+CACHE_SETTINGS = settings["aws_bedrock"]["chat"]["cache"]
+
+DEFAULT_INFERENCE_CONFIG = {
+    "temperature": 0.7,
+    "maxTokens": 512,
+}
+
 class BedrockChat:
     def __init__(self, model_id: str = MODEL_ID):
-        """Initialize Bedrock chat client"""
-        self.bedrock_client = bedrock_client
+        """Initialize Bedrock chat client with an optional response cache"""
+        self.bedrock_client = get_bedrock_client()
         self.model_id = model_id
+        self.cache = None
+        if CACHE_SETTINGS["enabled"]:
+            self.cache = ResponseCache(
+                max_entries=CACHE_SETTINGS["max_entries"],
+                ttl_seconds=CACHE_SETTINGS["ttl_seconds"]
+            )
 
-    def generate_response(self, message: str, inference_config: Optional[Dict[str, Any]] = None) -> Dict:
+    def _cache_key(
+        self,
+        kind: str,
+        message: str,
+        inference_config: Optional[Dict[str, Any]],
+        use_cache: Optional[bool]
+    ) -> Optional[str]:
         """
-        Generate a response using Amazon Bedrock
+        Return the cache key for a request, or None if it should bypass the cache.
+
+        use_cache=False always bypasses. By default sampled requests (temperature > 0)
+        are cached too, unless cache_sampled is off in settings.yaml.
         """
+        if self.cache is None or use_cache is False:
+            return None
+        inference_config = inference_config or DEFAULT_INFERENCE_CONFIG
+        if not CACHE_SETTINGS["cache_sampled"] and inference_config.get("temperature", 0) > 0 and not use_cache:
+            return None
+        return ResponseCache.make_key(kind, self.model_id, message, inference_config)
+
+    @staticmethod
+    def _build_request(message: str, inference_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         if inference_config is None:
-            inference_config = {
-                "temperature": 0.7,
-                "maxTokens": 512,
-            }
+            inference_config = dict(DEFAULT_INFERENCE_CONFIG)
 
         messages = [
             {
@@ -26,11 +55,74 @@ class BedrockChat:
                 "content": [{"text": message}]
             }
         ]
+        return {"messages": messages, "inferenceConfig": inference_config}
+
+    def generate_response(
+        self,
+        message: str,
+        inference_config: Optional[Dict[str, Any]] = None,
+        use_cache: Optional[bool] = None
+    ) -> Dict:
+        """
+        Generate a response using Amazon Bedrock, answering repeated prompts from the cache
+
+        Args:
+            message: User message
+            inference_config: Bedrock inferenceConfig; defaults to DEFAULT_INFERENCE_CONFIG
+            use_cache: False to always call Bedrock, True to cache even when
+                cache_sampled is off; None follows settings.yaml
+        """
+        cache_key = self._cache_key("converse", message, inference_config, use_cache)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
 
         response = self.bedrock_client.converse(
             modelId=self.model_id,
-            messages=messages,
-            inferenceConfig=inference_config
+            **self._build_request(message, inference_config)
         )
 
+        if cache_key:
+            # The HTTP metadata belongs to the original call, not to later hits
+            self.cache.put(cache_key, {k: v for k, v in response.items() if k != "ResponseMetadata"})
         return response
+
+    def stream_response(
+        self,
+        message: str,
+        inference_config: Optional[Dict[str, Any]] = None,
+        use_cache: Optional[bool] = None
+    ) -> Iterator[str]:
+        """
+        Stream a response from Amazon Bedrock, yielding text deltas as they arrive.
+
+        A cached answer is yielded as a single chunk; a streamed answer is cached
+        once it has completed.
+        """
+        cache_key = self._cache_key("stream", message, inference_config, use_cache)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        response = self.bedrock_client.converse_stream(
+            modelId=self.model_id,
+            **self._build_request(message, inference_config)
+        )
+
+        chunks = []
+        completed = False
+        for event in response["stream"]:
+            if "contentBlockDelta" in event:
+                text = event["contentBlockDelta"]["delta"].get("text")
+                if text:
+                    chunks.append(text)
+                    yield text
+            elif "messageStop" in event:
+                completed = True
+                break
+
+        if cache_key and completed:
+            self.cache.put(cache_key, "".join(chunks))
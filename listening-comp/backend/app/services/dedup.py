@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .ngram_index import normalize
+
+# Mersenne prime used for the universal hash family of the MinHash permutations
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WHITESPACE = re.compile(r"\s+")
+
+DEDUP_POLICIES = ("skip", "merge", "tag")
+
+def shingles(text: str, k: int = 3) -> Set[str]:
+    """Character k-grams of the normalized text with whitespace removed"""
+    text = _WHITESPACE.sub("", normalize(text))
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+class MinHasher:
+    """MinHash signatures whose agreement rate estimates the Jaccard similarity of shingle sets"""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+            for s in shingles(text, self.shingle_size)
+        ]
+        if not hashes:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH for a, b in self._params)
+
+    @staticmethod
+    def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+        return sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
+
+class DuplicateDetector:
+    """
+    Finds near-duplicate questions with MinHash signatures and an LSH band index.
+
+    Each signature is cut into bands; questions sharing any band land in the same
+    bucket, so a lookup only compares against a few candidates instead of every
+    stored question. Candidates are confirmed by their estimated Jaccard similarity.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        self._videos: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _bands(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        return self.hasher.signature(text)
+
+    def find(self, signature: Tuple[int, ...], video_id: str) -> Optional[Tuple[str, float]]:
+        """
+        Return (question_id, similarity) of the closest stored question from another
+        video, or None if nothing reaches the threshold.
+        """
+        with self._lock:
+            candidates = set()
+            for key in self._bands(signature):
+                candidates.update(self._buckets.get(key, ()))
+            best = None
+            for doc_id in candidates:
+                if self._videos[doc_id] == video_id:
+                    continue
+                score = MinHasher.similarity(signature, self._signatures[doc_id])
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (doc_id, score)
+            return best
+
+    def add(self, doc_id: str, video_id: str, signature: Tuple[int, ...]) -> None:
+        with self._lock:
+            self.remove([doc_id])
+            self._signatures[doc_id] = signature
+            self._videos[doc_id] = video_id
+            for key in self._bands(signature):
+                self._buckets.setdefault(key, set()).add(doc_id)
+
+    def remove(self, doc_ids: List[str]) -> None:
+        with self._lock:
+            for doc_id in doc_ids:
+                signature = self._signatures.pop(doc_id, None)
+                if signature is None:
+                    continue
+                del self._videos[doc_id]
+                for key in self._bands(signature):
+                    bucket = self._buckets[key]
+                    bucket.discard(doc_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def remove_video(self, video_id: str) -> None:
+        with self._lock:
+            self.remove([doc_id for doc_id, video in self._videos.items() if video == video_id])
+
+    def video_of(self, doc_id: str) -> Optional[str]:
+        with self._lock:
+            return self._videos.get(doc_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self._signatures.clear()
+            self._videos.clear()
+
+class DroppedDuplicates:
+    """
+    SQLite record of the questions the skip and merge policies did not store.
+
+    Each record keeps the dropped question (text and metadata) and the question it
+    duplicates, so a video whose questions were all duplicates still counts as
+    ingested, and the dropped copies can be stored again when the video holding
+    the kept copy is deleted or re-ingested.
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS dropped (
+                doc_id TEXT PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                source_hash TEXT NOT NULL,
+                canonical_id TEXT NOT NULL,
+                canonical_video_id TEXT NOT NULL,
+                document TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS dropped_video ON dropped (video_id, source_hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS dropped_canonical_video ON dropped (canonical_video_id)")
+        self._conn.commit()
+
+    def add_many(self, records: List[Dict[str, Any]]) -> None:
+        """Store records with doc_id, video_id, canonical_id, canonical_video_id, document and metadata"""
+        rows = [(
+            record["doc_id"],
+            record["video_id"],
+            record["metadata"].get("source_hash", ""),
+            record["canonical_id"],
+            record["canonical_video_id"],
+            record["document"],
+            json.dumps(record["metadata"], ensure_ascii=False)
+        ) for record in records]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO dropped VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def has_video(self, video_id: str, source_hash: Optional[str] = None) -> bool:
+        query = "SELECT 1 FROM dropped WHERE video_id = ?"
+        params: tuple = (video_id,)
+        if source_hash is not None:
+            query += " AND source_hash = ?"
+            params += (source_hash,)
+        with self._lock:
+            return self._conn.execute(query + " LIMIT 1", params).fetchone() is not None
+
+    def _take(self, column: str, video_ids: List[str]) -> List[Dict[str, Any]]:
+        placeholders = ",".join("?" * len(video_ids))
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                f"SELECT doc_id, video_id, canonical_id, canonical_video_id, document, metadata "
+                f"FROM dropped WHERE {column} IN ({placeholders}) ORDER BY canonical_id, doc_id",
+                video_ids
+            ).fetchall()
+            self._conn.execute(f"DELETE FROM dropped WHERE {column} IN ({placeholders})", video_ids)
+        return [{
+            "doc_id": doc_id,
+            "video_id": video_id,
+            "canonical_id": canonical_id,
+            "canonical_video_id": canonical_video_id,
+            "document": document,
+            "metadata": json.loads(metadata)
+        } for doc_id, video_id, canonical_id, canonical_video_id, document, metadata in rows]
+
+    def remove_videos(self, video_ids: List[str]) -> List[Dict[str, Any]]:
+        """Delete and return the dropped copies that belong to these videos"""
+        return self._take("video_id", video_ids) if video_ids else []
+
+    def take_orphans(self, video_ids: List[str]) -> List[Dict[str, Any]]:
+        """Delete and return the dropped copies whose kept question belongs to these videos"""
+        return self._take("canonical_video_id", video_ids) if video_ids else []
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM dropped")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
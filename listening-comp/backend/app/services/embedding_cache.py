@@ -0,0 +1,125 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List
+
+class EmbeddingCache:
+    """
+    Disk-backed, content-addressed cache of embeddings.
+
+    Entries are keyed by (model_id, sha256(text)) and stored as float32 blobs in a
+    SQLite file. The least recently used entries are evicted once the cache grows
+    beyond max_entries.
+    """
+
+    # SQLite limits the number of bound variables per statement
+    _QUERY_CHUNK_SIZE = 500
+
+    def __init__(self, db_path: str, max_entries: int = 100000):
+        """Open (or create) the cache database"""
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model_id TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model_id, text_hash)
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)"
+        )
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Return the content hash used as cache key for a text"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _chunks(items: List, size: int) -> Iterable[List]:
+        for i in range(0, len(items), size):
+            yield items[i:i + size]
+
+    def get_many(self, model_id: str, texts: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up embeddings for the given texts.
+
+        Returns:
+            Dict mapping each cached text to its embedding; misses are omitted
+        """
+        hashes = {self.text_hash(text): text for text in texts}
+        found = {}
+        now = time.time()
+        with self._lock:
+            for chunk in self._chunks(list(hashes), self._QUERY_CHUNK_SIZE):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, embedding FROM embeddings "
+                    f"WHERE model_id = ? AND text_hash IN ({placeholders})",
+                    [model_id, *chunk]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[hashes[text_hash]] = array("f", blob).tolist()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_access = ? WHERE model_id = ? AND text_hash = ?",
+                        [(now, model_id, text_hash) for text_hash, _ in rows]
+                    )
+            self._conn.commit()
+        return found
+
+    def put_many(self, model_id: str, embeddings: Dict[str, List[float]]) -> None:
+        """Store embeddings for the given texts and evict old entries if needed"""
+        if not embeddings:
+            return
+        now = time.time()
+        rows = [
+            (model_id, self.text_hash(text), array("f", embedding).tobytes(), now)
+            for text, embedding in embeddings.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model_id, text_hash, embedding, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if self._count > self.max_entries:
+                self._evict(self._count - self.max_entries)
+            self._conn.commit()
+
+    def _evict(self, n: int) -> None:
+        """Delete the n least recently used entries (caller holds the lock)"""
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+            (n,)
+        )
+        self._count -= n
+        print(f"Evicted {n} entries from embedding cache")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self) -> None:
+        """Remove all cached embeddings"""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._count = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
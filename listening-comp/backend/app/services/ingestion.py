@@ -0,0 +1,217 @@
+import os
+import threading
+from contextlib import ExitStack, nullcontext
+from typing import Any, Callable, Dict, List, Optional
+
+from .jobs import Job
+from .youtube import YouTubeTranscriptDownloader
+from .transcript_cache import TranscriptCache
+from .structuring_cache import StructuringCache
+from .streaming_indexer import StreamingIndexer
+from .text_extractor import TextPatternExtractor
+from .vector_store import QuestionVectorStore
+from ..core.config import DATA_DIR, settings
+from ..utils.file_handlers import process_and_save_questions, save_transcript
+
+class TranscriptIngestionPipeline:
+    """
+    Turns a YouTube video into indexed questions:
+    fetch (and save) transcript -> structure with LLM (and save questions) -> index.
+    """
+
+    STAGES = ["fetch_transcript", "structure", "index"]
+
+    def __init__(self, vector_store: QuestionVectorStore, llm: str = "nova-micro"):
+        self.vector_store = vector_store
+        self.llm = llm
+        cache_settings = settings["youtube"]["transcript_cache"]
+        cache = None
+        if cache_settings["enabled"]:
+            cache = TranscriptCache(
+                os.path.join(DATA_DIR, "transcripts"),
+                ttl_seconds=cache_settings["ttl_seconds"]
+            )
+        self.downloader = YouTubeTranscriptDownloader(cache=cache)
+        self.extractor = TextPatternExtractor()
+        self.structuring_cache = None
+        if settings["aws_bedrock"]["text_structurer"]["cache"]["enabled"]:
+            self.structuring_cache = StructuringCache(os.path.join(DATA_DIR, "structuring_cache.sqlite3"))
+        self.streaming_settings = settings["streaming_ingest"]
+
+    @staticmethod
+    def _stage(job: Optional[Job], name: str):
+        return job.stage(name) if job else nullcontext()
+
+    def fetch_transcript(self, video_id: str, force_refresh: bool = False) -> List[Dict]:
+        """Fetch (or load from cache) and save the transcript of a video"""
+        transcript = self.downloader.get_transcript(video_id, force_refresh=force_refresh)
+        print(f"Got transcript with {len(transcript)} entries")
+        if not save_transcript(transcript, video_id):
+            raise Exception("Failed to save transcript")
+        return transcript
+
+    def structure(
+        self,
+        video_id: str,
+        transcript: List[Dict],
+        on_question: Optional[Callable[[Dict[str, str]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Structure a transcript with the LLM, using the structuring cache when possible,
+        and save the questions file.
+
+        When on_question is given and the output is not cached, the LLM output is
+        streamed and on_question receives each question as soon as it is complete.
+
+        Returns:
+            dict: processed_text, cache_key and whether the output came from the cache
+        """
+        print(f"Combined transcript length: {sum(len(entry['text']) for entry in transcript)} chars")
+        cache_key = StructuringCache.make_key(transcript, self.extractor.cache_params(self.llm))
+        processed_text = self.structuring_cache.get(cache_key) if self.structuring_cache else None
+        cached = processed_text is not None
+        if cached:
+            print(f"Structuring cache hit for {video_id}")
+        else:
+            if on_question:
+                processed_text = self.extractor.invoke_llm_streaming(transcript, self.llm, on_question)
+            else:
+                processed_text = self.extractor.invoke_llm_chunked(transcript, self.llm)
+            if self.structuring_cache:
+                self.structuring_cache.put(cache_key, processed_text)
+        print(f"Processed text from LLM: {processed_text[:200]}...")  # Print first 200 chars
+
+        questions_file = os.path.join(DATA_DIR, "questions", f"{video_id}.txt")
+        if not (cached and os.path.exists(questions_file)):
+            processed_text = process_and_save_questions(processed_text, questions_file)
+
+        return {"processed_text": processed_text, "cache_key": cache_key, "cached": cached}
+
+    def _index(self, video_id: str, structured: Dict[str, Any]) -> bool:
+        """Index structured output unless the same output is already indexed"""
+        if structured["cached"] and self.vector_store.is_indexed(video_id, structured["cache_key"]):
+            print(f"Questions for {video_id} already indexed, skipping")
+            return True
+        indexed = self.vector_store.add_questions(
+            structured["processed_text"], video_id, source_hash=structured["cache_key"]
+        )
+        if not indexed:
+            print("Failed to add questions to vector store")
+        else:
+            print("Successfully added questions to vector store")
+        return indexed
+
+    def structure_and_index_streaming(
+        self,
+        video_id: str,
+        transcript: List[Dict],
+        job: Optional[Job] = None
+    ) -> Dict[str, Any]:
+        """
+        Structure a transcript and index its questions while the LLM is still streaming.
+
+        Questions are handed to a StreamingIndexer as their closing tags arrive, so
+        embedding overlaps generation. On a structuring cache hit there is nothing to
+        overlap and the questions are indexed as in the non-streaming path.
+
+        Returns:
+            dict: structure() result plus indexed and the streaming index counts
+        """
+        indexers: List[StreamingIndexer] = []
+        lock = threading.Lock()
+        cache_key = StructuringCache.make_key(transcript, self.extractor.cache_params(self.llm))
+
+        def on_question(question: Dict[str, str]) -> None:
+            with lock:
+                if not indexers:
+                    # First question of a fresh LLM run: clear the earlier ingest of this video
+                    self.vector_store.delete_videos([video_id])
+                    indexers.append(StreamingIndexer(
+                        self.vector_store,
+                        video_id,
+                        source_hash=cache_key,
+                        batch_size=self.streaming_settings["batch_size"],
+                        max_delay_seconds=self.streaming_settings["max_delay_seconds"]
+                    ))
+            indexers[0].add(question)
+
+        try:
+            structured = self.structure(video_id, transcript, on_question=on_question)
+        finally:
+            stats = indexers[0].close() if indexers else None
+
+        if stats is None:
+            structured["indexed"] = self._index(video_id, structured)
+        else:
+            structured["streaming_index"] = stats
+            print(f"Streamed {stats['indexed']} of {stats['added']} questions into the vector store")
+            if job:
+                job.set_stage_detail("index", stats)
+            if stats["failed_batches"]:
+                # The rows of the batches that did succeed carry this source_hash, so a
+                # later cache hit would take the video as indexed and never add the
+                # missing questions. Re-index the whole saved output instead; if that
+                # fails too, it deletes the partial rows first, so is_indexed stays False.
+                print(f"{stats['failed_batches']} streaming index batches failed for {video_id}, re-indexing")
+                structured["indexed"] = self.vector_store.add_questions(
+                    structured["processed_text"], video_id, source_hash=cache_key
+                )
+            else:
+                structured["indexed"] = stats["indexed"] > 0
+        return structured
+
+    def run(
+        self,
+        video_url: str,
+        job: Optional[Job] = None,
+        force_refresh: bool = False,
+        streaming: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Run every stage for one video.
+
+        Args:
+            video_url: YouTube video URL
+            job: Optional job to report per-stage progress to
+            force_refresh: Fetch the transcript again even if it is cached
+            streaming: Index questions while the LLM streams them (structure and
+                index then run concurrently); defaults to streaming_ingest.enabled
+
+        Returns:
+            dict: video_id, transcript, processed_text and whether indexing succeeded
+        """
+        video_id = self.downloader.extract_video_id(video_url)
+        print(f"Processing video: {video_id}")
+
+        with self._stage(job, "fetch_transcript"):
+            transcript = self.fetch_transcript(video_id, force_refresh)
+            if job:
+                job.set_stage_detail("fetch_transcript", {"entries": len(transcript)})
+
+        if streaming is None:
+            streaming = self.streaming_settings["enabled"]
+        if streaming:
+            with ExitStack() as stack:
+                for stage in ("structure", "index"):
+                    stack.enter_context(self._stage(job, stage))
+                structured = self.structure_and_index_streaming(video_id, transcript, job)
+                if job:
+                    job.set_stage_detail("structure", {"cached": structured["cached"], "streamed": True})
+            processed_text = structured["processed_text"]
+            indexed = structured["indexed"]
+        else:
+            with self._stage(job, "structure"):
+                structured = self.structure(video_id, transcript)
+                processed_text = structured["processed_text"]
+                if job:
+                    job.set_stage_detail("structure", {"cached": structured["cached"]})
+
+            with self._stage(job, "index"):
+                indexed = self._index(video_id, structured)
+
+        return {
+            "video_id": video_id,
+            "transcript": transcript,
+            "processed_text": processed_text,
+            "indexed": indexed
+        }
@@ -0,0 +1,131 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+class Job:
+    """
+    A unit of background work with per-stage progress.
+
+    Status moves from "queued" to "running" and ends in "succeeded" or "failed".
+    Each stage goes through "pending", "running" and "done" (or "failed").
+    """
+
+    def __init__(self, kind: str, stages: List[str], params: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = "queued"
+        self.stages = OrderedDict(
+            (name, {"status": "pending", "started_at": None, "finished_at": None, "detail": None})
+            for name in stages
+        )
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mark a stage as running for the duration of the block"""
+        with self._lock:
+            stage = self.stages.setdefault(
+                name, {"status": "pending", "started_at": None, "finished_at": None, "detail": None}
+            )
+            stage["status"] = "running"
+            stage["started_at"] = time.time()
+        try:
+            yield stage
+        except Exception as e:
+            with self._lock:
+                stage["status"] = "failed"
+                stage["detail"] = str(e)
+                stage["finished_at"] = time.time()
+            raise
+        with self._lock:
+            stage["status"] = "done"
+            stage["finished_at"] = time.time()
+
+    def set_stage_detail(self, name: str, detail: Any) -> None:
+        """Attach progress information (e.g. counts) to a stage"""
+        with self._lock:
+            if name in self.stages:
+                self.stages[name]["detail"] = detail
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serialisable status snapshot (without the result)"""
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "params": self.params,
+                "status": self.status,
+                "stages": {name: dict(stage) for name, stage in self.stages.items()},
+                "error": self.error,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at
+            }
+
+class JobManager:
+    """Runs jobs on a bounded worker pool and keeps the most recent ones in memory"""
+
+    def __init__(self, max_workers: int = 4, max_retained: int = 500):
+        self.max_retained = max_retained
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        kind: str,
+        stages: List[str],
+        func: Callable[[Job], Any],
+        params: Optional[Dict[str, Any]] = None
+    ) -> Job:
+        """
+        Queue func(job) for background execution.
+
+        Returns:
+            Job: The queued job; its id can be used to poll status and result
+        """
+        job = Job(kind, stages, params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, func)
+        return job
+
+    def _run(self, job: Job, func: Callable[[Job], Any]) -> None:
+        job.status = "running"
+        try:
+            job.result = func(job)
+            job.status = "succeeded"
+        except Exception as e:
+            print(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond max_retained (caller holds the lock)"""
+        excess = len(self._jobs) - self.max_retained
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at][:excess]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait)
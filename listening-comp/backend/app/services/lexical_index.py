@@ -0,0 +1,139 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Metadata fields whose text is indexed for keyword matching
+INDEXED_FIELDS = ("introduction", "conversation", "question")
+
+# Metadata fields that can be used as equality filters: video_id is set on every
+# parsed question, topic only on manually added ones (see add_questions_bulk)
+FILTER_FIELDS = ("video_id", "topic")
+
+_LATIN_WORD = re.compile(r"[A-Za-z0-9]+")
+_NON_WORD = re.compile(r"[\sA-Za-z0-9\W_]+")
+
+def tokenize(text: str, query: bool = False) -> List[str]:
+    """
+    Split text into index terms.
+
+    Japanese has no spaces, so runs of Japanese characters are turned into
+    overlapping character bigrams; Latin words and numbers are kept whole and
+    lower-cased. Documents also index every single character, so one-character
+    queries such as 駅 or 雨 match. Queries only use single characters for
+    one-character runs, so common characters do not dilute longer queries.
+    """
+    tokens = [word.lower() for word in _LATIN_WORD.findall(text)]
+    for run in _NON_WORD.split(text):
+        if len(run) == 1 or not query:
+            tokens.extend(run)
+        if len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists; each id scores sum(1 / (k + rank)) over the lists it appears in"""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+class LexicalIndex:
+    """In-memory BM25 inverted index over question metadata"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._doc_lengths: Dict[str, int] = {}
+        self._doc_terms: Dict[str, List[str]] = {}
+        self._attributes: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, doc_id: str, metadata: Dict[str, Any]) -> None:
+        """Index (or re-index) a question from its metadata"""
+        text = "\n".join(str(metadata.get(field, "")) for field in INDEXED_FIELDS)
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self.remove([doc_id])
+            for term, tf in terms.items():
+                self._postings[term][doc_id] = tf
+            self._doc_terms[doc_id] = list(terms)
+            length = sum(terms.values())
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+            self._attributes[doc_id] = {
+                field: metadata[field] for field in FILTER_FIELDS if field in metadata
+            }
+
+    def remove(self, doc_ids: List[str]) -> None:
+        with self._lock:
+            for doc_id in doc_ids:
+                if doc_id not in self._doc_lengths:
+                    continue
+                self._total_length -= self._doc_lengths.pop(doc_id)
+                self._attributes.pop(doc_id, None)
+                for term in self._doc_terms.pop(doc_id):
+                    del self._postings[term][doc_id]
+                    if not self._postings[term]:
+                        del self._postings[term]
+
+    def remove_video(self, video_id: str) -> None:
+        with self._lock:
+            self.remove([d for d, attrs in self._attributes.items() if attrs.get("video_id") == video_id])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._doc_lengths.clear()
+            self._doc_terms.clear()
+            self._attributes.clear()
+            self._total_length = 0
+
+    def _matches(self, doc_id: str, filters: Optional[Dict[str, Any]]) -> bool:
+        if not filters:
+            return True
+        attributes = self._attributes.get(doc_id, {})
+        return all(attributes.get(field) == value for field, value in filters.items())
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank questions by BM25 score for the query terms.
+
+        Args:
+            query: Search text
+            limit: Maximum number of results
+            filters: Equality filters on FILTER_FIELDS
+
+        Returns:
+            List of (doc_id, score), best first
+        """
+        terms = set(tokenize(query, query=True))
+        with self._lock:
+            n_docs = len(self._doc_lengths)
+            if not n_docs or not terms:
+                return []
+            avg_length = self._total_length / n_docs
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                docs = self._postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id, tf in docs.items():
+                    if not self._matches(doc_id, filters):
+                        continue
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
@@ -0,0 +1,312 @@
+import json
+import os
+import struct
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+NGRAM_SIZES = (1, 2, 3)
+SNAPSHOT_VERSION = 2
+# Snapshot layout: 8-byte little-endian header length, JSON header, posting bytes
+_HEADER_LENGTH = struct.Struct("<Q")
+
+def normalize(text: str) -> str:
+    """NFKC-normalize so full-width and half-width forms match each other"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+def ngrams(text: str, n: int) -> Iterable[str]:
+    return (text[i:i + n] for i in range(len(text) - n + 1))
+
+class NgramIndex:
+    """
+    Character unigram/bigram/trigram inverted index for substring search over
+    question text.
+
+    Documents get consecutive integer numbers, so every posting list is an
+    append-only, sorted array('I') of document numbers. Removed documents are only
+    tombstoned. A query is answered by intersecting the posting lists of its
+    longest usable n-grams and confirming the candidates with a plain substring
+    check, so results are exact without any network call. The intersection is
+    lazy and stops as soon as limit results are confirmed.
+
+    The index is persisted as a snapshot (a JSON header with the documents,
+    followed by the raw posting arrays; nothing is unpickled on load) plus an
+    append-only journal of changes since the snapshot. The journal is folded
+    into a new snapshot once it grows beyond compact_after entries.
+    """
+
+    def __init__(self, index_dir: str, compact_after: int = 5000):
+        self.index_dir = index_dir
+        self.compact_after = compact_after
+        self._snapshot_path = os.path.join(index_dir, "snapshot.idx")
+        # Version 1 snapshots were pickles; they are ignored and the index rebuilt
+        self._legacy_snapshot_path = os.path.join(index_dir, "snapshot.pkl")
+        self._journal_path = os.path.join(index_dir, "journal.jsonl")
+        self._lock = threading.RLock()
+        self._journal = None
+        self._journal_entries = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._doc_ids: List[str] = []
+        self._video_ids: List[str] = []
+        self._texts: List[str] = []
+        self._alive = bytearray()
+        self._id_to_num: Dict[str, int] = {}
+        self._video_docs: Dict[str, List[int]] = {}
+        self._postings: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._id_to_num)
+
+    # Persistence
+
+    def exists(self) -> bool:
+        return os.path.exists(self._snapshot_path)
+
+    def load(self) -> bool:
+        """Load the snapshot and replay the journal; returns False if nothing is persisted"""
+        with self._lock:
+            if not self.exists():
+                return False
+            with open(self._snapshot_path, 'rb') as f:
+                header_length, = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+                header = json.loads(f.read(header_length).decode("utf-8"))
+                if header.get("version") != SNAPSHOT_VERSION or header.get("itemsize") != array('I').itemsize:
+                    print("N-gram index snapshot has another version or layout, ignoring it")
+                    return False
+                data = array('I')
+                data.frombytes(f.read())
+            postings = {}
+            start = 0
+            for gram, length in zip(header["grams"], header["lengths"]):
+                postings[gram] = data[start:start + length]
+                start += length
+            self._restore({**header, "postings": postings})
+
+            self._journal_entries = 0
+            torn = False
+            if os.path.exists(self._journal_path):
+                with open(self._journal_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            torn = True  # Torn write at the end of the journal
+                            break
+                        self._apply(entry)
+                        self._journal_entries += 1
+                        if not line.endswith("\n"):
+                            torn = True  # Complete entry, but the newline was not written
+            if torn:
+                # New entries would be appended to the torn fragment and be lost on
+                # the next load, so fold what was replayed into a fresh snapshot
+                print("N-gram index journal has a torn tail, compacting")
+                self.compact()
+            print(f"Loaded n-gram index with {len(self)} questions")
+            return True
+
+    def compact(self) -> None:
+        """Drop tombstones, write a new snapshot and truncate the journal"""
+        with self._lock:
+            self._renumber()
+            os.makedirs(self.index_dir, exist_ok=True)
+            grams = list(self._postings)
+            header = json.dumps({
+                "version": SNAPSHOT_VERSION,
+                "itemsize": array('I').itemsize,
+                "doc_ids": self._doc_ids,
+                "video_ids": self._video_ids,
+                "texts": self._texts,
+                "grams": grams,
+                "lengths": [len(self._postings[gram]) for gram in grams],
+            }, ensure_ascii=False).encode("utf-8")
+            tmp_path = f"{self._snapshot_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER_LENGTH.pack(len(header)))
+                f.write(header)
+                for gram in grams:
+                    f.write(self._postings[gram].tobytes())
+            os.replace(tmp_path, self._snapshot_path)
+            if os.path.exists(self._legacy_snapshot_path):
+                os.remove(self._legacy_snapshot_path)
+
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+            open(self._journal_path, 'w').close()
+            self._journal_entries = 0
+
+    def _renumber(self) -> None:
+        """Give live documents consecutive numbers and rewrite the posting lists"""
+        if all(self._alive):
+            return
+        remap = array('i', [-1]) * len(self._doc_ids)
+        live = [num for num in range(len(self._doc_ids)) if self._alive[num]]
+        for new_num, old_num in enumerate(live):
+            remap[old_num] = new_num
+
+        postings = {}
+        for gram, old in self._postings.items():
+            new = array('I', (remap[num] for num in old if remap[num] >= 0))
+            if new:
+                postings[gram] = new
+        self._restore({
+            "doc_ids": [self._doc_ids[num] for num in live],
+            "video_ids": [self._video_ids[num] for num in live],
+            "texts": [self._texts[num] for num in live],
+            "postings": postings,
+        })
+
+    def _restore(self, state: Dict[str, Any]) -> None:
+        """Install documents and posting lists that have no tombstones"""
+        self._doc_ids = list(state["doc_ids"])
+        self._video_ids = list(state["video_ids"])
+        self._texts = list(state["texts"])
+        self._alive = bytearray(b"\x01") * len(self._doc_ids)
+        self._id_to_num = {doc_id: num for num, doc_id in enumerate(self._doc_ids)}
+        self._video_docs = {}
+        for num, video_id in enumerate(self._video_ids):
+            self._video_docs.setdefault(video_id, []).append(num)
+        self._postings = dict(state["postings"])
+
+    def _log(self, entries: List[Dict[str, Any]]) -> None:
+        if not self.exists():
+            # First write: the snapshot already contains these entries
+            self.compact()
+            return
+        if self._journal is None:
+            self._journal = open(self._journal_path, 'a', encoding='utf-8')
+        for entry in entries:
+            self._journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        self._journal_entries += len(entries)
+        if self._journal_entries >= self.compact_after:
+            self.compact()
+
+    # Mutations
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        op = entry["op"]
+        if op == "add":
+            self._add(entry["id"], entry["video_id"], entry["text"])
+        elif op == "remove_video":
+            self._remove_video(entry["video_id"])
+
+    def _add(self, doc_id: str, video_id: str, text: str) -> None:
+        old = self._id_to_num.get(doc_id)
+        if old is not None:
+            self._alive[old] = 0
+        num = len(self._doc_ids)
+        self._doc_ids.append(doc_id)
+        self._video_ids.append(video_id)
+        self._texts.append(text)
+        self._alive.append(1)
+        self._id_to_num[doc_id] = num
+        self._video_docs.setdefault(video_id, []).append(num)
+        for n in NGRAM_SIZES:
+            for gram in set(ngrams(text, n)):
+                postings = self._postings.get(gram)
+                if postings is None:
+                    postings = self._postings[gram] = array('I')
+                postings.append(num)
+
+    def _remove_video(self, video_id: str) -> None:
+        for num in self._video_docs.pop(video_id, []):
+            if self._alive[num]:
+                self._alive[num] = 0
+                del self._id_to_num[self._doc_ids[num]]
+
+    def add(self, doc_id: str, video_id: str, fields: Dict[str, str]) -> None:
+        """Index one parsed question (introduction, conversation and question text)"""
+        self.add_many([(doc_id, video_id, fields)])
+
+    def add_many(self, docs: List[tuple]) -> None:
+        """Index (doc_id, video_id, fields) tuples and journal them in one write"""
+        entries = []
+        for doc_id, video_id, fields in docs:
+            text = normalize("\n".join(
+                fields.get(field, "") for field in ("introduction", "conversation", "question")
+            ))
+            entries.append({"op": "add", "id": doc_id, "video_id": video_id, "text": text})
+        with self._lock:
+            for entry in entries:
+                self._apply(entry)
+            self._log(entries)
+
+    def remove_video(self, video_id: str) -> None:
+        with self._lock:
+            entry = {"op": "remove_video", "video_id": video_id}
+            self._apply(entry)
+            self._log([entry])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+            self.compact()
+
+    # Queries
+
+    def _candidates(self, query: str) -> Iterator[int]:
+        """
+        Lazily yield, in increasing order, the document numbers that contain every
+        n-gram of the query.
+
+        The shortest posting list drives the walk; the others are searched with a
+        cursor that only moves forward, so stopping early costs nothing extra.
+        """
+        n = max(size for size in NGRAM_SIZES if size <= len(query))
+        lists = []
+        for gram in set(ngrams(query, n)):
+            postings = self._postings.get(gram)
+            if postings is None:
+                return
+            lists.append(postings)
+        lists.sort(key=len)
+        smallest, others = lists[0], lists[1:]
+        cursors = [0] * len(others)
+        for num in smallest:
+            for j, other in enumerate(others):
+                i = cursors[j] = bisect_left(other, num, cursors[j])
+                if i == len(other):
+                    return
+                if other[i] != num:
+                    break
+            else:
+                yield num
+
+    def search(self, query: str, limit: int = 20, video_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Find questions whose text contains the query as a substring.
+
+        Returns:
+            List of dicts with id, video_id and a snippet around the first match
+        """
+        query = normalize(query.strip())
+        if not query:
+            return []
+        results = []
+        with self._lock:
+            for num in self._candidates(query):
+                if not self._alive[num] or (video_id and self._video_ids[num] != video_id):
+                    continue
+                text = self._texts[num]
+                pos = text.find(query)
+                if pos < 0:
+                    continue
+                results.append({
+                    "id": self._doc_ids[num],
+                    "video_id": self._video_ids[num],
+                    "snippet": text[max(0, pos - 20):pos + len(query) + 20]
+                })
+                if len(results) >= limit:
+                    break
+        return results
+
+    def close(self) -> None:
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
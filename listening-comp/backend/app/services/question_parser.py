@@ -0,0 +1,167 @@
+import difflib
+import re
+from typing import Dict, Iterable, List, Optional
+
+FIELDS = ("introduction", "conversation", "question")
+KNOWN_TAGS = FIELDS + ("item", "items")
+
+# A complete tag; the name is captured without attributes
+_TAG = re.compile(r"<\s*(/?)\s*([A-Za-z_][\w-]*)[^<>]*>")
+# Section labels of the gpt4o format, e.g. "Introduction:" or "**Question：**"
+_LABEL = re.compile(r"[*_#\s]*(introduction|conversation|question)[*_\s]*[:：][*_\s]*", re.IGNORECASE)
+# An unterminated "<" longer than this is treated as text, not as the start of a tag
+_MAX_TAG_LENGTH = 64
+
+def classify_tag(name: str) -> Optional[str]:
+    """Map a possibly misspelled tag name (e.g. "ntroduction") to a known tag"""
+    name = name.lower()
+    if name in KNOWN_TAGS:
+        return name
+    matches = difflib.get_close_matches(name, KNOWN_TAGS, n=1, cutoff=0.75)
+    return matches[0] if matches else None
+
+def make_question(introduction: str, conversation: str, question: str) -> Dict[str, str]:
+    return {
+        "introduction": introduction,
+        "conversation": conversation,
+        "question": question,
+        "full_text": f"{introduction}\n{conversation}\n{question}"
+    }
+
+def parse_labeled_sections(text: str) -> Dict[str, str]:
+    """Split a gpt4o `<question>` body into its labeled sections"""
+    sections = {}
+    matches = list(_LABEL.finditer(text))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        sections.setdefault(match.group(1).lower(), text[match.end():end].strip())
+    return sections
+
+class QuestionStreamParser:
+    """
+    Incremental, tolerant parser for the structured LLM output.
+
+    Text can be fed in arbitrary chunks (e.g. as a model streams its answer); each
+    completed question is returned by the feed call that completes it. Every
+    character is scanned once, only a trailing partial tag is kept between calls.
+
+    Two formats are understood:
+      - nova-micro: `<item>` elements with `<introduction>`, `<conversation>` and
+        `<question>` children. Misspelled tag names are matched to the closest
+        known tag, and missing closing tags are implied by the next opening tag.
+      - gpt4o: top-level `<question>` elements containing "Introduction:",
+        "Conversation:" and "Question:" sections.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_item = False      # inside a nova item (explicit or implied)
+        self._in_labeled = False   # inside a gpt4o top-level <question>
+        self._field: Optional[str] = None
+        self._fields: Dict[str, str] = {}
+        self._text: List[str] = []
+        self.skipped = 0
+
+    def _take_text(self) -> str:
+        # Code fences around the whole output can end up inside an unterminated last field
+        text = "".join(self._text).strip().strip("`").strip()
+        self._text = []
+        return text
+
+    def _close_field(self) -> None:
+        if self._field:
+            self._fields.setdefault(self._field, self._take_text())
+        self._field = None
+        self._text = []
+
+    def _finish_item(self, out: List[Dict[str, str]]) -> None:
+        if self._in_labeled:
+            self._fields = parse_labeled_sections(self._take_text())
+        else:
+            self._close_field()
+        if any(self._fields.values()):
+            if all(self._fields.get(field) for field in FIELDS):
+                out.append(make_question(*(self._fields[field] for field in FIELDS)))
+            else:
+                self.skipped += 1
+                print(f"Skipping item: missing {', '.join(f for f in FIELDS if not self._fields.get(f))}")
+        self._in_item = self._in_labeled = False
+        self._fields = {}
+        self._text = []
+
+    def _handle_tag(self, closing: bool, tag: Optional[str], out: List[Dict[str, str]]) -> None:
+        if self._in_labeled:
+            # Only the closing wrapper ends a gpt4o question; other tags are content
+            if closing and tag == "question":
+                self._finish_item(out)
+            return
+
+        if tag == "item":
+            if self._in_item:
+                self._finish_item(out)
+            self._in_item = not closing
+        elif tag in FIELDS:
+            if closing:
+                if self._in_item and self._field:
+                    self._close_field()
+            elif self._in_item or tag != "question":
+                if not self._in_item or tag in self._fields:
+                    # A field outside an item, or a repeated field, starts a new item
+                    if self._in_item:
+                        self._finish_item(out)
+                    self._in_item = True
+                self._close_field()
+                self._field = tag
+            else:
+                self._in_labeled = True
+                self._text = []
+
+    def feed(self, chunk: str) -> List[Dict[str, str]]:
+        """Consume the next piece of output and return the questions it completed"""
+        out: List[Dict[str, str]] = []
+        text = self._buffer + chunk
+        pos = 0
+        for match in _TAG.finditer(text):
+            if self._field or self._in_labeled:
+                self._text.append(text[pos:match.start()])
+            self._handle_tag(bool(match.group(1)), classify_tag(match.group(2)), out)
+            pos = match.end()
+
+        # Keep a possible partial tag at the end for the next chunk
+        tail = text.rfind("<", pos)
+        keep_from = tail if tail >= 0 and ">" not in text[tail:] and len(text) - tail <= _MAX_TAG_LENGTH else len(text)
+        if self._field or self._in_labeled:
+            self._text.append(text[pos:keep_from])
+        self._buffer = text[keep_from:]
+        return out
+
+    def close(self) -> List[Dict[str, str]]:
+        """Flush the end of the output; an unterminated last item is still kept"""
+        out = self.feed("")
+        if self._field or self._in_labeled:
+            self._text.append(self._buffer)
+        self._buffer = ""
+        if self._in_item or self._in_labeled:
+            self._finish_item(out)
+        return out
+
+def parse_questions(chunks: Iterable[str]) -> List[Dict[str, str]]:
+    """Parse complete or chunked LLM output into question dicts"""
+    parser = QuestionStreamParser()
+    questions = []
+    for chunk in chunks:
+        questions.extend(parser.feed(chunk))
+    questions.extend(parser.close())
+    return questions
+
+def question_key(question: Dict[str, str]) -> str:
+    """Whitespace-insensitive identity of a question, for de-duplication"""
+    return re.sub(r"\s+", "", question["full_text"])
+
+def format_items(questions: List[Dict[str, str]]) -> str:
+    """Write questions as a normalized nova-style `<items>` document that parse_questions reads back"""
+    items = [
+        "<item>\n" + "\n".join(f"<{field}>{question[field]}</{field}>" for field in FIELDS) + "\n</item>"
+        for question in questions
+    ]
+    return "<items>\n" + "\n".join(items) + "\n</items>"
@@ -0,0 +1,107 @@
+import threading
+import time
+from typing import Any, Dict, List
+
+from .vector_store import QuestionVectorStore
+
+class StreamingIndexer:
+    """
+    Collects questions of one video as they are parsed and writes them to the
+    vector store in batches from a background thread.
+
+    A batch is flushed once it holds batch_size questions or its oldest question
+    has waited max_delay_seconds, so embedding and indexing overlap the LLM call
+    that is still producing the rest of the video's questions.
+    """
+
+    def __init__(
+        self,
+        vector_store: QuestionVectorStore,
+        video_id: str,
+        source_hash: str = "",
+        batch_size: int = 8,
+        max_delay_seconds: float = 2.0
+    ):
+        self.vector_store = vector_store
+        self.video_id = video_id
+        self.source_hash = source_hash
+        self.batch_size = batch_size
+        self.max_delay_seconds = max_delay_seconds
+        self.added = 0
+        self.indexed = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self._next_index = 0
+        self._buffer: List[Dict[str, str]] = []
+        self._buffer_since = 0.0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name=f"index-{video_id}", daemon=True)
+        self._worker.start()
+
+    def add(self, question: Dict[str, str]) -> None:
+        """Queue a parsed question; safe to call from several threads"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("StreamingIndexer is closed")
+            if not self._buffer:
+                self._buffer_since = time.monotonic()
+            self._buffer.append(question)
+            self.added += 1
+            if len(self._buffer) >= self.batch_size:
+                self._condition.notify()
+
+    def _next_batch(self) -> List[Dict[str, str]]:
+        """Wait until a batch is due; an empty list means the indexer is closed and drained"""
+        with self._condition:
+            while True:
+                if len(self._buffer) >= self.batch_size or (self._closed and self._buffer):
+                    break
+                if self._closed:
+                    return []
+                if self._buffer:
+                    remaining = self._buffer_since + self.max_delay_seconds - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                else:
+                    self._condition.wait()
+            batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+            self._buffer_since = time.monotonic()
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            start = time.perf_counter()
+            success = self.vector_store.add_parsed_questions([{
+                "video_id": self.video_id,
+                "questions": batch,
+                "source_hash": self.source_hash,
+                "start_index": self._next_index
+            }], replace=False)
+            self._next_index += len(batch)
+            self.batches += 1
+            if success:
+                self.indexed += len(batch)
+            else:
+                self.failed_batches += 1
+            print(
+                f"Streaming index {self.video_id}: batch of {len(batch)} "
+                f"{'written' if success else 'failed'} in {time.perf_counter() - start:.2f}s"
+            )
+
+    def close(self) -> Dict[str, Any]:
+        """Flush the remaining questions, wait for the writes and return counts"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._worker.join()
+        return {
+            "added": self.added,
+            "indexed": self.indexed,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches
+        }
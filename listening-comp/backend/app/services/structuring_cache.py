@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+class StructuringCache:
+    """
+    Memoizes LLM structuring output in SQLite.
+
+    The key covers everything that can change the output: the transcript segments,
+    the model id, the prompt version and the inference/chunking parameters.
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS structured_output (
+                cache_key TEXT PRIMARY KEY,
+                output TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(transcript: List[Dict], params: Dict[str, Any]) -> str:
+        """Return a stable hash of the transcript segments and structuring parameters"""
+        payload = {
+            "transcript": [[s["text"], s.get("start"), s.get("duration")] for s in transcript],
+            "params": params
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """Return the cached output for a key, counting the hit or miss"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output FROM structured_output WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, cache_key: str, output: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO structured_output (cache_key, output, created_at) VALUES (?, ?, ?)",
+                (cache_key, output, time.time())
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM structured_output").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
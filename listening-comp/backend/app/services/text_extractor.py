@@ -1,8 +1,13 @@
-from typing import Optional, Dict, Any
-from openai import OpenAI
-import os
+from typing import Optional, Dict, Any, List, Iterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+import threading
 from ..core.config import settings
-from . import bedrock_client
+from ..core.clients import get_openai_client
+from . import get_bedrock_client
+from .question_parser import QuestionStreamParser, format_items, parse_questions, question_key
+
+# Bump whenever a structuring prompt changes so memoized outputs are invalidated
+PROMPT_VERSION = 2
 
 class TextPatternExtractor:
     """
@@ -14,17 +19,47 @@ class TextPatternExtractor:
         """
         Initialize the extractor.
         """
-        self.bedrock_client = bedrock_client
+        self.bedrock_client = get_bedrock_client()
         self.model_id = settings['aws_bedrock']['text_structurer']['model_id']
         self.max_tokens = settings['aws_bedrock']['text_structurer']['max_tokens']
         self.temperature = settings['aws_bedrock']['text_structurer']['temperature']
         self.top_p = settings['aws_bedrock']['text_structurer']['top_p']
+        chunking = settings['aws_bedrock']['text_structurer']['chunking']
+        self.chunking_enabled = chunking['enabled']
+        self.chunk_max_chars = chunking['max_chars']
+        self.chunk_min_gap_seconds = chunking['min_gap_seconds']
+        self.chunk_max_workers = chunking['max_workers']
 
-    def invoke_nova_llm(self, text: str) -> str:
-        """
-        Use Amazon Bedrock to extract Introduction, Conversation, and Question patterns.
-        """
-        prompt = f"""
+    def cache_params(self, llm: str) -> Dict[str, Any]:
+        """Return every setting that influences the structured output for an LLM"""
+        if llm == "nova-micro":
+            model_params = {
+                "model_id": self.model_id,
+                "temperature": self.temperature,
+                "max_tokens": self.max_tokens,
+            }
+        elif llm == "gpt4o":
+            model_params = {
+                "model_id": settings['openai']['text_structurer']['gpt4o']['model_id'],
+                "temperature": 0.7,
+                "max_tokens": 2048,
+            }
+        else:
+            raise ValueError(f"Unsupported LLM: {llm}")
+
+        return {
+            "llm": llm,
+            "prompt_version": PROMPT_VERSION,
+            **model_params,
+            "chunking": {
+                "enabled": self.chunking_enabled,
+                "max_chars": self.chunk_max_chars,
+                "min_gap_seconds": self.chunk_min_gap_seconds,
+            }
+        }
+
+    def _nova_prompt(self, text: str) -> str:
+        return f"""
        
         ## **Role:**  
         You are a text processing AI specialized in transforming Japanese listening comprehension scripts into structured XML `<question>` elements.
@@ -48,7 +83,7 @@ class TextPatternExtractor:
 
         ## **Example:**
         <item>
-        <ntroduction>my introduction</instroduction>
+        <introduction>my introduction</introduction>
 
         <conversation>my conversation</conversation>
 
@@ -76,33 +111,43 @@ class TextPatternExtractor:
         Text:
         {text}
         """
-        messages = [
-            {
-                "role": "user",
-                "content": [{'text': prompt}]
-            }
-        ]
 
-        response = self.bedrock_client.converse(
-            modelId=self.model_id,
-            messages=messages,
-            inferenceConfig={
+    def _nova_request(self, text: str) -> Dict[str, Any]:
+        return {
+            "modelId": self.model_id,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [{'text': self._nova_prompt(text)}]
+                }
+            ],
+            "inferenceConfig": {
                 "temperature": self.temperature,
                 "maxTokens": self.max_tokens,
             }
-        )
+        }
 
-        return response
+    def invoke_nova_llm(self, text: str) -> str:
+        """
+        Use Amazon Bedrock to extract Introduction, Conversation, and Question patterns.
+        """
+        return self.bedrock_client.converse(**self._nova_request(text))
 
-    def invoke_gpt4o_llm(self, text: str) -> str:
+    def stream_nova_llm(self, text: str) -> Iterator[str]:
         """
-        Use OpenAI GPT-4 to extract Introduction, Conversation, and Question patterns.
+        Like invoke_nova_llm, but yield the output text as Bedrock streams it
         """
-        try:
-            client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-            openai_settings = settings['openai']['text_structurer']['gpt4o']
-            
-            prompt = f"""
+        response = self.bedrock_client.converse_stream(**self._nova_request(text))
+        for event in response["stream"]:
+            if "contentBlockDelta" in event:
+                delta = event["contentBlockDelta"]["delta"].get("text")
+                if delta:
+                    yield delta
+            elif "messageStop" in event:
+                break
+
+    def _gpt4o_request(self, text: str) -> Dict[str, Any]:
+        prompt = f"""
             ## **Role:**  
             You are a text processing expert specialized in transforming Japanese listening comprehension transcripts into structured `<question>` elements.
 
@@ -126,22 +171,40 @@ class TextPatternExtractor:
             Text to process:
             {text}
             """
+        return {
+            "model": settings['openai']['text_structurer']['gpt4o']['model_id'],
+            "messages": [
+                {"role": "system", "content": "You are a text processing expert."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 2048
+        }
 
-            response = client.chat.completions.create(
-                model=openai_settings['model_id'],
-                messages=[
-                    {"role": "system", "content": "You are a text processing expert."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=2048
-            )
-            
+    def invoke_gpt4o_llm(self, text: str) -> str:
+        """
+        Use OpenAI GPT-4 to extract Introduction, Conversation, and Question patterns.
+        """
+        try:
+            client = get_openai_client()
+            response = client.chat.completions.create(**self._gpt4o_request(text))
             return response.choices[0].message.content
             
         except Exception as e:
             raise Exception(f"Error in GPT-4 processing: {str(e)}")
 
+    def stream_gpt4o_llm(self, text: str) -> Iterator[str]:
+        """
+        Like invoke_gpt4o_llm, but yield the output text as OpenAI streams it
+        """
+        try:
+            client = get_openai_client()
+            for chunk in client.chat.completions.create(stream=True, **self._gpt4o_request(text)):
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise Exception(f"Error in GPT-4 processing: {str(e)}")
+
     def invoke_llm(self, text: str, llm: str) -> str:
         """
         Use LLM to extract Introduction, Conversation, and Question patterns.
@@ -155,3 +218,146 @@ class TextPatternExtractor:
             raise ValueError(f"Unsupported LLM: {llm}")
         
         return output
+
+    def stream_llm(self, text: str, llm: str) -> Iterator[str]:
+        """
+        Like invoke_llm, but yield the output text as the model produces it.
+        """
+        if llm == "gpt4o":
+            return self.stream_gpt4o_llm(text)
+        elif llm == "nova-micro":
+            return self.stream_nova_llm(text)
+        raise ValueError(f"Unsupported LLM: {llm}")
+
+    @staticmethod
+    def split_transcript(transcript: List[Dict], max_chars: int, min_gap_seconds: float) -> List[str]:
+        """
+        Split transcript segments into chunks of at most max_chars characters.
+
+        Chunks are cut at pauses (a gap of at least min_gap_seconds between the end of
+        one segment and the start of the next) so that a conversation is not split in
+        the middle. A chunk is only cut at an arbitrary segment when it contains no pause.
+        """
+        chunks = []
+        current: List[str] = []
+        current_len = 0
+        last_pause = 0  # number of segments in current before the latest pause
+        previous_end = None
+
+        for entry in transcript:
+            text = entry['text']
+            start = entry.get('start')
+            if previous_end is not None and start is not None and start - previous_end >= min_gap_seconds:
+                last_pause = len(current)
+            if start is not None:
+                previous_end = start + entry.get('duration', 0)
+
+            if current and current_len + len(text) + 1 > max_chars:
+                cut = last_pause or len(current)
+                chunks.append(' '.join(current[:cut]))
+                current = current[cut:]
+                current_len = sum(len(t) + 1 for t in current)
+                last_pause = 0
+
+            current.append(text)
+            current_len += len(text) + 1
+
+        if current:
+            chunks.append(' '.join(current))
+        return chunks
+
+    @staticmethod
+    def merge_outputs(outputs: List[str]) -> str:
+        """
+        Merge per-chunk LLM outputs into one normalized `<items>` document.
+
+        Each output is parsed with the tolerant QuestionStreamParser, so items
+        truncated by max_tokens, misspelled tags and both prompt formats survive
+        the merge; questions repeated across chunks are kept once.
+        """
+        questions = []
+        seen = set()
+        for output in outputs:
+            for question in parse_questions([output]):
+                key = question_key(question)
+                if key not in seen:
+                    seen.add(key)
+                    questions.append(question)
+        return format_items(questions)
+
+    def invoke_llm_chunked(self, transcript: List[Dict], llm: str) -> str:
+        """
+        Structure a transcript in chunks that are sent to the LLM concurrently.
+
+        Args:
+            transcript: Transcript segments with 'text', 'start' and 'duration' keys
+            llm: LLM name accepted by invoke_llm
+
+        Returns:
+            str: Merged, de-duplicated structured output
+        """
+        if not self.chunking_enabled:
+            return self.invoke_llm(' '.join(entry['text'] for entry in transcript), llm)
+
+        chunks = self.split_transcript(transcript, self.chunk_max_chars, self.chunk_min_gap_seconds)
+        print(f"Split transcript into {len(chunks)} chunks")
+        if len(chunks) == 1:
+            return self.invoke_llm(chunks[0], llm)
+
+        with ThreadPoolExecutor(max_workers=min(self.chunk_max_workers, len(chunks))) as executor:
+            outputs = list(executor.map(lambda chunk: self.invoke_llm(chunk, llm), chunks))
+
+        return self.merge_outputs(outputs)
+
+    def invoke_llm_streaming(
+        self,
+        transcript: List[Dict],
+        llm: str,
+        on_question: Callable[[Dict[str, str]], None]
+    ) -> str:
+        """
+        Structure a transcript like invoke_llm_chunked, but stream the model output.
+
+        Each question is passed to on_question as soon as its closing tag arrives,
+        so the caller can index it while the model is still generating. With
+        chunking, the chunks stream concurrently and on_question is called from
+        several threads; a question repeated across chunks is only reported once.
+
+        Returns:
+            str: Merged, de-duplicated structured output, as from invoke_llm_chunked
+        """
+        if self.chunking_enabled:
+            chunks = self.split_transcript(transcript, self.chunk_max_chars, self.chunk_min_gap_seconds)
+        else:
+            chunks = [' '.join(entry['text'] for entry in transcript)]
+        print(f"Streaming {len(chunks)} chunks through {llm}")
+
+        seen = set()
+        seen_lock = threading.Lock()
+
+        def stream_chunk(chunk: str) -> str:
+            parser = QuestionStreamParser()
+            output = []
+
+            def report(questions: List[Dict[str, str]]) -> None:
+                for question in questions:
+                    key = question_key(question)
+                    with seen_lock:
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                    on_question(question)
+
+            for delta in self.stream_llm(chunk, llm):
+                output.append(delta)
+                report(parser.feed(delta))
+            report(parser.close())
+            return "".join(output)
+
+        if len(chunks) == 1:
+            return stream_chunk(chunks[0])
+
+        with ThreadPoolExecutor(max_workers=min(self.chunk_max_workers, len(chunks))) as executor:
+            outputs = list(executor.map(stream_chunk, chunks))
+
+        return self.merge_outputs(outputs)
@@ -0,0 +1,58 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+class TranscriptCache:
+    """
+    On-disk cache of transcript segments, one JSON file per video.
+
+    Unlike the plain-text transcript saved by save_transcript, the cached file keeps
+    every segment with its start and duration so that chunking can still use the
+    timestamps on a cache hit.
+    """
+
+    def __init__(self, cache_dir: str, ttl_seconds: Optional[float] = None):
+        """
+        Args:
+            cache_dir: Directory holding {video_id}.json files
+            ttl_seconds: Maximum age of a cached transcript; None never expires
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, video_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{video_id}.json")
+
+    def get(self, video_id: str, languages: List[str]) -> Optional[List[Dict]]:
+        """Return cached segments, or None if missing, expired or fetched for other languages"""
+        try:
+            with open(self._path(video_id), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("languages") != list(languages):
+            return None
+        if self.ttl_seconds is not None and time.time() - entry.get("fetched_at", 0) > self.ttl_seconds:
+            print(f"Cached transcript for {video_id} expired")
+            return None
+        return entry["segments"]
+
+    def put(self, video_id: str, languages: List[str], segments: List[Dict]) -> None:
+        """Store segments for a video, replacing any previous entry atomically"""
+        entry = {
+            "video_id": video_id,
+            "languages": list(languages),
+            "fetched_at": time.time(),
+            "segments": [
+                {"text": s["text"], "start": s.get("start"), "duration": s.get("duration")}
+                for s in segments
+            ]
+        }
+        path = self._path(video_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
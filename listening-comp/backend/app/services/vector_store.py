@@ -2,36 +2,155 @@ import chromadb
 from chromadb.config import Settings
 from chromadb.utils import embedding_functions
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Iterator
+import functools
+import hashlib
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from ..core.config import settings
 import xml.etree.ElementTree as ET
-from . import bedrock_client
+from . import get_bedrock_client
+from .embedding_cache import EmbeddingCache
+from .lexical_index import LexicalIndex, FILTER_FIELDS, reciprocal_rank_fusion
+from .ngram_index import NgramIndex
+from .dedup import DuplicateDetector, DroppedDuplicates, DEDUP_POLICIES
+from .question_parser import parse_questions
+
+EMBEDDING_SETTINGS = settings["aws_bedrock"]["embeddings"]
+
+RETRIEVAL_SETTINGS = settings["retrieval"]
+
+DEDUP_SETTINGS = settings["dedup"]
+
+COLLECTION_NAME = "japanese_questions"
+# Bump when the document/metadata layout of the collection changes so that
+# stores written by older code are rebuilt instead of silently reused
+SCHEMA_VERSION = 1
 
 class BedrockEmbeddingFunction(embedding_functions.EmbeddingFunction):
-    def __init__(self):
-        self.bedrock_client = bedrock_client
-        self.model_id = "amazon.titan-embed-text-v1"  # Amazon's embedding model
+    def __init__(
+        self,
+        model_id: str = EMBEDDING_SETTINGS["model_id"],
+        max_workers: int = EMBEDDING_SETTINGS["max_workers"],
+        cache: Optional[EmbeddingCache] = None
+    ):
+        self.bedrock_client = get_bedrock_client()
+        self.model_id = model_id  # Amazon's embedding model
+        self.max_workers = max(1, max_workers)
+        self.cache = cache
+
+    def _embed_text(self, text: str) -> List[float]:
+        """
+        Embed a single text.
+
+        Throttling is retried by the shared client's adaptive retry mode
+        (clients.bedrock in settings.yaml), so there is no retry loop here.
+        """
+        response = self.bedrock_client.invoke_model(
+            modelId=self.model_id,
+            body=json.dumps({
+                "inputText": text
+            })
+        )
+        return json.loads(response['body'].read())['embedding']
 
     def __call__(self, input: List[str]) -> List[List[float]]:
         """Generate embeddings for a list of texts using Amazon Titan"""
-        embeddings = []
-        for text in input:
-            response = self.bedrock_client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps({
-                    "inputText": text
-                })
-            )
-            embedding = json.loads(response['body'].read())['embedding']
-            embeddings.append(embedding)
+        if not input:
+            return []
+
+        cached = self.cache.get_many(self.model_id, input) if self.cache is not None else {}
+        # Only embed each distinct uncached text once
+        missing = [text for text in dict.fromkeys(input) if text not in cached]
+        if missing:
+            fresh = dict(zip(missing, self._embed_batch(missing)))
+            if self.cache is not None:
+                self.cache.put_many(self.model_id, fresh)
+            cached.update(fresh)
+        if self.cache is not None:
+            print(f"Embedding cache: {len(input) - len(missing)} hits, {len(missing)} misses")
+
+        return [cached[text] for text in input]
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts through a bounded worker pool, keeping input order"""
+        start = time.perf_counter()
+        workers = min(self.max_workers, len(texts))
+        if workers == 1:
+            embeddings = [self._embed_text(text) for text in texts]
+        else:
+            # executor.map keeps results in input order
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                embeddings = list(executor.map(self._embed_text, texts))
+
+        elapsed = time.perf_counter() - start
+        print(f"Embedded batch of {len(texts)} texts with {workers} workers in {elapsed:.2f}s")
         return embeddings
 
+def _serialized(method):
+    """
+    Run a vector store write under the store's write lock.
+
+    Duplicate lookups followed by detector adds, also_in_videos read-modify-writes
+    and restores of dropped duplicates must not interleave between the job
+    workers, streaming indexers and batch flushes that write concurrently. The
+    lock is reentrant, since these writes call each other.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class QuestionVectorStore:
-    def __init__(self, persist_directory: str = "chroma_db"):
-        """Initialize ChromaDB client with persistence"""
-        # Initialize embedding function with Bedrock
-        self.embedding_function = BedrockEmbeddingFunction()
+    def __init__(self, persist_directory: str = "chroma_db", rebuild: bool = False):
+        """
+        Initialize ChromaDB client with persistence.
+
+        The existing collection is reopened when its schema version and embedding
+        model match the current code; otherwise (or when rebuild is True) it is
+        recreated empty.
+        """
+        self.persist_directory = persist_directory
+
+        # Initialize embedding function with Bedrock, backed by an on-disk cache
+        # that lives next to the ChromaDB directory
+        cache = None
+        if EMBEDDING_SETTINGS["cache"]["enabled"]:
+            cache = EmbeddingCache(
+                os.path.join(os.path.dirname(os.path.abspath(persist_directory)), "embedding_cache.sqlite3"),
+                max_entries=EMBEDDING_SETTINGS["cache"]["max_entries"]
+            )
+        self.embedding_function = BedrockEmbeddingFunction(cache=cache)
+
+        # Keyword index for hybrid retrieval, built from the collection on first use
+        self.lexical_index = LexicalIndex()
+        self._lexical_ready = False
+        self._index_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+
+        # Persistent n-gram index for substring search, stored next to the ChromaDB directory
+        self.ngram_index = NgramIndex(
+            os.path.join(os.path.dirname(os.path.abspath(persist_directory)), "ngram_index")
+        )
+        self._ngram_ready = self.ngram_index.load()
+
+        # Near-duplicate detection across videos, built from the collection on first ingest
+        self.dedup_policy = DEDUP_SETTINGS["policy"] if DEDUP_SETTINGS["enabled"] else None
+        if self.dedup_policy and self.dedup_policy not in DEDUP_POLICIES:
+            raise ValueError(f"Unknown dedup policy {self.dedup_policy}, expected one of {DEDUP_POLICIES}")
+        self.duplicate_detector = DuplicateDetector(
+            threshold=DEDUP_SETTINGS["threshold"],
+            num_perm=DEDUP_SETTINGS["num_perm"],
+            bands=DEDUP_SETTINGS["bands"]
+        ) if self.dedup_policy else None
+        self._dedup_ready = False
+        # Questions dropped by the skip and merge policies, kept so they can be restored
+        self.dropped_duplicates = DroppedDuplicates(
+            os.path.join(os.path.dirname(os.path.abspath(persist_directory)), "dedup_dropped.sqlite3")
+        ) if self.dedup_policy else None
         
         # Ensure the persist directory exists
         os.makedirs(persist_directory, exist_ok=True)
@@ -41,78 +160,139 @@ class QuestionVectorStore:
             is_persistent=True
         ))
         
-        # Delete existing collection if it exists
+        self.collection = self._create_collection() if rebuild else self._open_or_create_collection()
+
+    def _collection_metadata(self) -> Dict[str, Any]:
+        return {
+            "hnsw:space": "cosine",
+            "schema_version": SCHEMA_VERSION,
+            "embedding_model": self.embedding_function.model_id
+        }
+
+    def _open_or_create_collection(self):
+        """Reopen the persisted collection if it is compatible, else recreate it"""
+        # Only a missing collection is created here; any other error from opening it
+        # (a locked database, a bad config) propagates instead of wiping the store.
+        # list_collections() returns names from chromadb 0.6 on, collections before.
+        existing = {
+            collection if isinstance(collection, str) else collection.name
+            for collection in self.client.list_collections()
+        }
+        if COLLECTION_NAME not in existing:
+            print(f"Creating collection {COLLECTION_NAME}")
+            return self._create_collection()
+
+        collection = self.client.get_collection(
+            name=COLLECTION_NAME,
+            embedding_function=self.embedding_function
+        )
+
+        metadata = collection.metadata or {}
+        if (metadata.get("schema_version") == SCHEMA_VERSION
+                and metadata.get("embedding_model") == self.embedding_function.model_id):
+            print(f"Opened collection {COLLECTION_NAME} with {collection.count()} questions")
+            return collection
+
+        print(
+            f"Collection {COLLECTION_NAME} has schema {metadata.get('schema_version')} / "
+            f"model {metadata.get('embedding_model')}, expected {SCHEMA_VERSION} / "
+            f"{self.embedding_function.model_id}; recreating it"
+        )
+        return self._create_collection()
+
+    def _create_collection(self):
+        """Drop the collection if it exists and create an empty one"""
         try:
-            self.client.delete_collection(name="japanese_questions")
-        except ValueError:
+            self.client.delete_collection(name=COLLECTION_NAME)
+        except Exception:
             pass
+
+        self.lexical_index.clear()
+        self._lexical_ready = True
+        self.ngram_index.clear()
+        self._ngram_ready = True
+        if self.duplicate_detector is not None:
+            self.duplicate_detector.clear()
+            self._dedup_ready = True
+            self.dropped_duplicates.clear()
         
         # Create collection with custom embedding function
-        self.collection = self.client.create_collection(
-            name="japanese_questions",
-            metadata={"hnsw:space": "cosine"},
+        return self.client.create_collection(
+            name=COLLECTION_NAME,
+            metadata=self._collection_metadata(),
             embedding_function=self.embedding_function
         )
 
+    def rebuild(self, questions_dir: Optional[str] = None) -> int:
+        """
+        Recreate the collection and re-ingest saved question files.
+
+        Args:
+            questions_dir: Directory of {video_id}.txt files written by the
+                transcript pipeline. When None, the collection is only emptied.
+
+        Returns:
+            int: Number of videos re-ingested
+        """
+        self.collection = self._create_collection()
+        if not questions_dir or not os.path.isdir(questions_dir):
+            return 0
+
+        ingested = 0
+        for filename in sorted(os.listdir(questions_dir)):
+            if not filename.endswith(".txt"):
+                continue
+            video_id = filename[:-len(".txt")]
+            with open(os.path.join(questions_dir, filename), 'r', encoding='utf-8') as f:
+                if self.add_questions(f.read(), video_id):
+                    ingested += 1
+        print(f"Rebuilt collection from {ingested} question files")
+        return ingested
+
     def parse_question_xml(self, xml_text: str) -> List[Dict[str, str]]:
-        """Parse XML-like formatted questions into structured data"""
-        questions = []
+        """Parse XML-like formatted questions into structured data (see QuestionStreamParser)"""
         print(f"Parsing XML text: {xml_text[:200]}...")
-        
         try:
-            # Remove Markdown code block markers if present
-            clean_xml = xml_text.strip()
-            if clean_xml.startswith("```"):
-                clean_xml = "\n".join(clean_xml.split("\n")[1:-1])
-            
-            # Split into items
-            items = clean_xml.split('</item>')
-            print(f"Found {len(items)} potential items")
-            
-            def extract_tag_content(text: str, tag: str) -> str:
-                try:
-                    start_tag = f"<{tag}>"
-                    end_tag = f"</{tag}>"
-                    start = text.index(start_tag) + len(start_tag)
-                    end = text.index(end_tag, start)
-                    return text[start:end].strip()
-                except (ValueError, IndexError):
-                    return ""
-            
-            for item in items:
-                if not item.strip() or '<item>' not in item:
-                    continue
-                    
-                try:
-                    # Extract content for each tag
-                    introduction = extract_tag_content(item, "introduction")
-                    conversation = extract_tag_content(item, "conversation")
-                    question = extract_tag_content(item, "question")
-                    
-                    # Validate all fields are present
-                    if introduction and conversation and question:
-                        questions.append({
-                            "introduction": introduction,
-                            "conversation": conversation,
-                            "question": question,
-                            "full_text": f"{introduction}\n{conversation}\n{question}"
-                        })
-                        print(f"Successfully parsed question with intro: {introduction[:50]}...")
-                    else:
-                        print(f"Skipping item: missing required content")
-                        
-                except Exception as e:
-                    print(f"Error parsing item: {e}")
-                    continue
-            
+            questions = parse_questions([xml_text])
         except Exception as e:
             print(f"Error parsing XML: {e}")
-        
+            questions = []
         print(f"Total questions parsed: {len(questions)}")
         return questions
 
-    def add_questions(self, xml_text: str, video_id: str) -> bool:
-        """Add questions from XML text to the vector store"""
+    def is_indexed(self, video_id: str, source_hash: str) -> bool:
+        """Check whether a video's questions were indexed from the given structured output"""
+        try:
+            result = self.collection.get(
+                where={"$and": [{"video_id": video_id}, {"source_hash": source_hash}]},
+                limit=1,
+                include=[]
+            )
+            # A video whose questions were all dropped as duplicates has no rows
+            return bool(result['ids']) or bool(
+                self.dropped_duplicates and self.dropped_duplicates.has_video(video_id, source_hash)
+            )
+        except Exception as e:
+            print(f"Error checking indexed video {video_id}: {e}")
+            return False
+
+    def has_video(self, video_id: str) -> bool:
+        """Check whether any question from a video is in the vector store"""
+        try:
+            if self.collection.get(where={"video_id": video_id}, limit=1, include=[])['ids']:
+                return True
+            return bool(self.dropped_duplicates and self.dropped_duplicates.has_video(video_id))
+        except Exception as e:
+            print(f"Error checking video {video_id}: {e}")
+            return False
+
+    def add_questions(self, xml_text: str, video_id: str, source_hash: str = "") -> bool:
+        """
+        Add questions from XML text to the vector store.
+
+        source_hash identifies the structured output the questions came from, so that
+        unchanged videos can be skipped on re-ingest (see is_indexed).
+        """
         try:
             questions = self.parse_question_xml(xml_text)
             
@@ -121,88 +301,523 @@ class QuestionVectorStore:
                 return False
             print(f"Successfully parsed {len(questions)} questions")
             
-            try:
-                # Prepare data for ChromaDB
-                documents = [q["full_text"] for q in questions]
-                print(f"Prepared {len(documents)} documents")
-                
-                metadatas = [{
-                    "video_id": video_id,
-                    "introduction": q["introduction"],
-                    "conversation": q["conversation"],
-                    "question": q["question"]
-                } for q in questions]
-                print(f"Prepared {len(metadatas)} metadata entries")
+            return self.add_parsed_questions([{
+                "video_id": video_id,
+                "questions": questions,
+                "source_hash": source_hash
+            }])
                 
-                ids = [f"{video_id}_{i}" for i in range(len(questions))]
-                print(f"Generated {len(ids)} IDs")
-                
-                # Add to collection
-                try:
-                    self.collection.add(
-                        documents=documents,
-                        metadatas=metadatas,
-                        ids=ids
-                    )
-                    print(f"Successfully added {len(documents)} questions to vector store")
-                    return True
-                except Exception as e:
-                    print(f"Failed to add to collection: {str(e)}")
-                    print(f"First document sample: {documents[0][:100]}...")
-                    print(f"First metadata sample: {metadatas[0]}")
-                    return False
-                    
+        except Exception as e:
+            print(f"Failed to parse questions: {str(e)}")
+            return False
+
+    @_serialized
+    def delete_videos(self, video_ids: List[str]) -> None:
+        """
+        Remove every question of the given videos from the collection and the local indexes.
+
+        Duplicates that were dropped in favour of a question of these videos are
+        stored again, so deleting or re-ingesting a video never loses another
+        video's questions.
+        """
+        if len(video_ids) == 1:
+            self.collection.delete(where={"video_id": video_ids[0]})
+        else:
+            self.collection.delete(where={"video_id": {"$in": video_ids}})
+        for video_id in video_ids:
+            if self._lexical_ready:
+                self.lexical_index.remove_video(video_id)
+            if self._ngram_ready:
+                self.ngram_index.remove_video(video_id)
+            if self.duplicate_detector is not None:
+                # Re-ingesting a video must not match its own earlier questions
+                self.duplicate_detector.remove_video(video_id)
+        if self.dropped_duplicates:
+            own = self.dropped_duplicates.remove_videos(video_ids)
+            if own and self.dedup_policy == "merge":
+                self._unrecord_merged(own)
+            orphans = self.dropped_duplicates.take_orphans(video_ids)
+            if orphans:
+                self._restore_dropped(orphans)
+
+    @_serialized
+    def _restore_dropped(self, records: List[Dict[str, Any]]) -> None:
+        """Store dropped duplicates again, deduplicating them against each other and the store"""
+        videos: Dict[tuple, Dict[str, Any]] = {}
+        for record in records:
+            metadata = record["metadata"]
+            key = (record["video_id"], metadata.get("source_hash", ""))
+            videos.setdefault(key, {
+                "video_id": record["video_id"],
+                "source_hash": metadata.get("source_hash", ""),
+                "questions": []
+            })["questions"].append({
+                "id": record["doc_id"],
+                "introduction": metadata.get("introduction", ""),
+                "conversation": metadata.get("conversation", ""),
+                "question": metadata.get("question", ""),
+                "full_text": record["document"]
+            })
+        print(f"Restoring {len(records)} duplicates whose kept copy was deleted")
+        if not self.add_parsed_questions(list(videos.values()), replace=False):
+            # Keep the records so the next delete or rebuild can try again
+            self.dropped_duplicates.add_many(records)
+
+    @_serialized
+    def add_parsed_questions(self, videos: List[Dict[str, Any]], replace: bool = True) -> bool:
+        """
+        Add parsed questions of one or more videos with a single collection write.
+
+        Args:
+            videos: Dicts with video_id, questions (as returned by parse_question_xml),
+                an optional source_hash and an optional start_index for the question ids
+            replace: Delete earlier questions of these videos first. The streaming
+                ingest passes False to append batches of a video it already cleared.
+        """
+        video_ids = [video["video_id"] for video in videos]
+        if replace:
+            try:
+                self.delete_videos(video_ids)
             except Exception as e:
-                print(f"Failed to prepare data for vector store: {str(e)}")
+                print(f"Failed to delete earlier questions: {str(e)}")
                 return False
-                
+
+        try:
+            if self.duplicate_detector is not None:
+                self._ensure_dedup_index()
+
+            # Prepare data for ChromaDB
+            documents, metadatas, ids = [], [], []
+            merged: Dict[str, List[str]] = {}
+            dropped: List[Dict[str, Any]] = []
+            for video in videos:
+                video_id = video["video_id"]
+                for i, q in enumerate(video["questions"], start=video.get("start_index", 0)):
+                    doc_id = q.get("id") or f"{video_id}_{i}"
+                    metadata = {
+                        "video_id": video_id,
+                        "source_hash": video.get("source_hash", ""),
+                        "introduction": q["introduction"],
+                        "conversation": q["conversation"],
+                        "question": q["question"]
+                    }
+                    if self.duplicate_detector is not None:
+                        signature = self.duplicate_detector.signature(q["full_text"])
+                        match = self.duplicate_detector.find(signature, video_id)
+                        if match and self.dedup_policy == "tag":
+                            metadata["duplicate_of"] = match[0]
+                        elif match:
+                            # skip and merge both keep only the first copy
+                            merged.setdefault(match[0], []).append(video_id)
+                            dropped.append({
+                                "doc_id": doc_id,
+                                "video_id": video_id,
+                                "canonical_id": match[0],
+                                "canonical_video_id": self.duplicate_detector.video_of(match[0]) or "",
+                                "document": q["full_text"],
+                                "metadata": metadata
+                            })
+                            continue
+                        else:
+                            self.duplicate_detector.add(doc_id, video_id, signature)
+                    documents.append(q["full_text"])
+                    metadatas.append(metadata)
+                    ids.append(doc_id)
+            duplicates = sum(len(v) for v in merged.values()) + sum("duplicate_of" in m for m in metadatas)
+            print(
+                f"Prepared {len(documents)} documents from {len(videos)} videos"
+                + (f" ({duplicates} near-duplicates, policy {self.dedup_policy})" if duplicates else "")
+            )
+            if not documents and not merged:
+                return False
+            
         except Exception as e:
-            print(f"Failed to parse questions: {str(e)}")
+            print(f"Failed to prepare data for vector store: {str(e)}")
             return False
 
+        if self.dedup_policy == "merge" and merged:
+            self._record_merged(merged, dict(zip(ids, metadatas)))
+
+        # Add to collection
+        try:
+            if documents:
+                self.collection.upsert(
+                    documents=documents,
+                    metadatas=metadatas,
+                    ids=ids
+                )
+            print(f"Successfully added {len(documents)} questions to vector store")
+        except Exception as e:
+            print(f"Failed to add to collection: {str(e)}")
+            if documents:
+                print(f"First document sample: {documents[0][:100]}...")
+                print(f"First metadata sample: {metadatas[0]}")
+            # The duplicate detector may now hold questions that were never written
+            self._dedup_ready = False
+            return False
+
+        if dropped:
+            self.dropped_duplicates.add_many(dropped)
+
+        if self._lexical_ready:
+            self._index_lexical(ids, documents, metadatas)
+        if self._ngram_ready:
+            self.ngram_index.add_many([
+                (doc_id, metadata["video_id"], metadata) for doc_id, metadata in zip(ids, metadatas)
+            ])
+        return True
+
+    def _ensure_dedup_index(self) -> None:
+        """Compute signatures for the stored questions the first time they are needed"""
+        if self._dedup_ready:
+            return
+        with self._index_lock:
+            if self._dedup_ready:
+                return
+            self.duplicate_detector.clear()
+            for question in self.iter_questions():
+                metadata = question["metadata"]
+                # Tagged copies are never used as the canonical question
+                if not metadata.get("video_id") or metadata.get("duplicate_of"):
+                    continue
+                signature = self.duplicate_detector.signature(question["text"])
+                self.duplicate_detector.add(question["id"], metadata["video_id"], signature)
+            self._dedup_ready = True
+            print(f"Built duplicate index over {len(self.duplicate_detector)} questions")
+
+    def _unrecord_merged(self, records: List[Dict[str, Any]]) -> None:
+        """Remove the videos of deleted dropped copies from the also_in_videos list of the kept question"""
+        removed: Dict[str, set] = {}
+        for record in records:
+            removed.setdefault(record["canonical_id"], set()).add(record["video_id"])
+        try:
+            result = self.collection.get(ids=list(removed), include=["metadatas"])
+            if not result['ids']:
+                return
+            self.collection.update(
+                ids=result['ids'],
+                metadatas=[{
+                    **metadata,
+                    "also_in_videos": ",".join(
+                        v for v in metadata.get("also_in_videos", "").split(",") if v and v not in removed[doc_id]
+                    )
+                } for doc_id, metadata in zip(result['ids'], result['metadatas'])]
+            )
+        except Exception as e:
+            print(f"Failed to update merged duplicates: {str(e)}")
+
+    def _record_merged(self, merged: Dict[str, List[str]], pending: Dict[str, Dict[str, Any]]) -> None:
+        """Add the videos of dropped duplicates to the also_in_videos list of the kept question"""
+        def merge(metadata: Dict[str, Any], video_ids: List[str]) -> Dict[str, Any]:
+            # ChromaDB metadata values must be scalars, so the list is comma-separated
+            also_in = [v for v in metadata.get("also_in_videos", "").split(",") if v]
+            also_in.extend(v for v in dict.fromkeys(video_ids) if v not in also_in)
+            return {**metadata, "also_in_videos": ",".join(also_in)}
+
+        stored = [doc_id for doc_id in merged if doc_id not in pending]
+        for doc_id in merged:
+            if doc_id in pending:
+                pending[doc_id].update(merge(pending[doc_id], merged[doc_id]))
+        if not stored:
+            return
+        try:
+            result = self.collection.get(ids=stored, include=["metadatas"])
+            self.collection.update(
+                ids=result['ids'],
+                metadatas=[merge(metadata, merged[doc_id]) for doc_id, metadata in zip(result['ids'], result['metadatas'])]
+            )
+        except Exception as e:
+            print(f"Failed to record merged duplicates: {str(e)}")
+
+    @staticmethod
+    def question_id(text: str, answer: str, topic: str) -> str:
+        """Content-hash id for a manually added question; stable across deletes"""
+        digest = hashlib.sha256(f"{topic}\x1f{text}\x1f{answer}".encode("utf-8")).hexdigest()
+        return f"q_{digest[:24]}"
+
+    def add_questions_bulk(self, questions: List[Dict[str, str]]) -> int:
+        """
+        Add manually written questions with a single collection write.
+
+        Args:
+            questions: Dicts with text, answer and optional topic (default "general")
+
+        Returns:
+            int: Number of distinct questions written
+        """
+        records = {}
+        for question in questions:
+            topic = question.get("topic", "general")
+            question_id = self.question_id(question["text"], question["answer"], topic)
+            records[question_id] = (question["text"], {"answer": question["answer"], "topic": topic})
+        if not records:
+            return 0
+
+        # Content-hash ids make re-adding the same question an idempotent upsert
+        self.collection.upsert(
+            ids=list(records),
+            documents=[text for text, _ in records.values()],
+            metadatas=[metadata for _, metadata in records.values()]
+        )
+        print(f"Added {len(records)} questions to vector store")
+        if self._lexical_ready:
+            self._index_lexical(
+                list(records),
+                [text for text, _ in records.values()],
+                [metadata for _, metadata in records.values()]
+            )
+        return len(records)
+
     def add_question(self, text: str, answer: str, topic: str = "general"):
         """Add a single question to the vector store"""
         try:
-            self.collection.add(
-                documents=[text],
-                metadatas=[{"answer": answer, "topic": topic}],
-                ids=[f"q_{len(self.collection.get()['ids']) + 1}"]
-            )
+            self.add_questions_bulk([{"text": text, "answer": answer, "topic": topic}])
             return True
         except Exception as e:
             print(f"Error adding question: {e}")
             return False
 
-    def find_similar_questions(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
+    @staticmethod
+    def build_where(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Turn equality filters into a ChromaDB where clause"""
+        filters = {field: value for field, value in (filters or {}).items() if value is not None}
+        unknown = set(filters) - set(FILTER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unsupported filters: {', '.join(sorted(unknown))}")
+        if not filters:
+            return None
+        if len(filters) == 1:
+            return filters
+        return {"$and": [{field: value} for field, value in filters.items()]}
+
+    def _index_lexical(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        for doc_id, document, metadata in zip(ids, documents, metadatas):
+            # Manually added questions keep their text in the document only
+            if "question" not in metadata:
+                metadata = {**metadata, "question": document}
+            self.lexical_index.add(doc_id, metadata)
+
+    def _ensure_lexical_index(self) -> None:
+        """Build the keyword index from the collection the first time it is needed"""
+        if self._lexical_ready:
+            return
+        with self._index_lock:
+            if self._lexical_ready:
+                return
+            ids, documents, metadatas = [], [], []
+            for question in self.iter_questions():
+                ids.append(question["id"])
+                documents.append(question["text"])
+                metadatas.append(question["metadata"])
+            self._index_lexical(ids, documents, metadatas)
+            self._lexical_ready = True
+            print(f"Built lexical index over {len(ids)} questions")
+
+    def _ensure_ngram_index(self) -> None:
+        """Build the n-gram index from the collection if it was not persisted yet"""
+        if self._ngram_ready:
+            return
+        with self._index_lock:
+            if self._ngram_ready:
+                return
+            docs = [
+                (question["id"], question["metadata"]["video_id"], question["metadata"])
+                for question in self.iter_questions(fields=["id", "metadata"])
+                if question["metadata"].get("video_id")
+            ]
+            self.ngram_index.clear()
+            self.ngram_index.add_many(docs)
+            self.ngram_index.compact()
+            self._ngram_ready = True
+            print(f"Built n-gram index over {len(docs)} questions")
+
+    def search_questions(self, query: str, limit: int = 20, video_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Find parsed questions containing the query text, without embedding it"""
+        self._ensure_ngram_index()
+        return self.ngram_index.search(query, limit, video_id)
+
+    def find_similar_questions(
+        self,
+        query: str,
+        n_results: int = 5,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
         """Find similar questions using vector similarity"""
+        return self.find_similar_questions_batch([query], n_results, filters)[0]
+
+    def find_similar_questions_batch(
+        self,
+        queries: List[str],
+        n_results: int = 5,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Find similar questions for several queries at once.
+
+        All queries are embedded in one concurrent (and cached) batch and sent to
+        ChromaDB in a single query call.
+
+        Returns:
+            List of similar-question lists, in the same order as queries
+        """
+        if not queries:
+            return []
+
         results = self.collection.query(
-            query_texts=[query],
-            n_results=n_results
+            query_embeddings=self.embedding_function(queries),
+            n_results=n_results,
+            where=self.build_where(filters)
         )
         
         # Format results
-        similar_questions = []
-        for i in range(len(results['ids'][0])):
-            similar_questions.append({
-                "id": results['ids'][0][i],
-                "question": results['metadatas'][0][i].get("question", ""),
-                "distance": results['distances'][0][i] if 'distances' in results else None
-            })
+        grouped = []
+        for q in range(len(queries)):
+            similar_questions = []
+            returned = set(results['ids'][q])
+            for i in range(len(results['ids'][q])):
+                metadata = results['metadatas'][q][i]
+                # Drop tagged near-duplicates whose original is already in the results
+                if metadata.get("duplicate_of") in returned:
+                    continue
+                similar_questions.append({
+                    "id": results['ids'][q][i],
+                    "question": metadata.get("question", ""),
+                    "distance": results['distances'][q][i] if results.get('distances') else None
+                })
+            grouped.append(similar_questions)
             
-        return similar_questions
+        return grouped
+
+    def find_similar_questions_hybrid(
+        self,
+        query: str,
+        n_results: int = 5,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find similar questions by fusing vector and keyword rankings.
+
+        A where-filtered vector query and a keyword search over the introduction,
+        conversation and question text each return n_results * candidate_multiplier
+        candidates, which are combined with reciprocal-rank fusion.
+        """
+        self._ensure_lexical_index()
+        candidates = n_results * RETRIEVAL_SETTINGS["candidate_multiplier"]
+
+        vector_results = self.find_similar_questions(query, candidates, filters)
+        lexical_results = self.lexical_index.search(query, candidates, filters)
+        fused = reciprocal_rank_fusion(
+            [[r["id"] for r in vector_results], [doc_id for doc_id, _ in lexical_results]],
+            k=RETRIEVAL_SETTINGS["rrf_k"]
+        )[:n_results]
+
+        by_id = {r["id"]: r for r in vector_results}
+        lexical_scores = dict(lexical_results)
+        missing = [doc_id for doc_id, _ in fused if doc_id not in by_id]
+        if missing:
+            result = self.collection.get(ids=missing, include=["metadatas", "documents"])
+            for doc_id, metadata, document in zip(result['ids'], result['metadatas'], result['documents']):
+                by_id[doc_id] = {
+                    "id": doc_id,
+                    "question": metadata.get("question", document),
+                    "distance": None
+                }
+
+        return [
+            {**by_id[doc_id], "score": score, "keyword_score": lexical_scores.get(doc_id)}
+            for doc_id, score in fused if doc_id in by_id
+        ]
+
+    # Fields that can be requested from get_questions_page
+    QUESTION_FIELDS = ("id", "text", "metadata")
+
+    def _resolve_fields(self, fields: Optional[List[str]]) -> tuple:
+        """Validate a field projection and return it with the matching ChromaDB include list"""
+        fields = list(fields or self.QUESTION_FIELDS)
+        unknown = set(fields) - set(self.QUESTION_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        include = []
+        if "text" in fields:
+            include.append("documents")
+        if "metadata" in fields:
+            include.append("metadatas")
+        return fields, include
+
+    @staticmethod
+    def _format_questions(result: Dict[str, Any], fields: List[str]) -> List[Dict[str, Any]]:
+        questions = []
+        for i in range(len(result['ids'])):
+            question = {}
+            if "id" in fields:
+                question['id'] = result['ids'][i]
+            if "text" in fields:
+                question['text'] = result['documents'][i]
+            if "metadata" in fields:
+                question['metadata'] = result['metadatas'][i]
+            questions.append(question)
+        return questions
+
+    def get_questions_page(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        fields: Optional[List[str]] = None,
+        video_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one page of questions from the vector store.
+
+        ChromaDB's get has no ordering or range filter on ids, so pages are
+        offset-based: each page skips offset rows, and questions written or deleted
+        between pages shift later pages. Use iter_questions to walk the whole store.
+
+        Args:
+            limit: Maximum number of questions to return
+            offset: Number of questions to skip
+            fields: Subset of QUESTION_FIELDS to return; all when None
+            video_id: Only return questions from this video
+
+        Returns:
+            dict: questions and next_offset (None on the last page)
+        """
+        fields, include = self._resolve_fields(fields)
+        result = self.collection.get(
+            where={"video_id": video_id} if video_id else None,
+            limit=limit,
+            offset=offset,
+            include=include
+        )
+        questions = self._format_questions(result, fields)
+        next_offset = offset + len(questions) if len(result['ids']) == limit else None
+        return {"questions": questions, "next_offset": next_offset}
+
+    def iter_questions(
+        self,
+        page_size: int = 500,
+        fields: Optional[List[str]] = None,
+        video_id: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield all matching questions, fetching them page by page.
+
+        The matching ids are listed once up front (ids only, no documents or
+        metadata) and pages are then fetched by id. A walk therefore costs O(n)
+        rather than re-skipping an offset on every page, and writes or deletes
+        during the walk cannot make it skip or repeat questions; questions deleted
+        meanwhile are left out.
+        """
+        fields, include = self._resolve_fields(fields)
+        ids = self.collection.get(where={"video_id": video_id} if video_id else None, include=[])['ids']
+        for start in range(0, len(ids), page_size):
+            result = self.collection.get(ids=ids[start:start + page_size], include=include)
+            yield from self._format_questions(result, fields)
 
     def get_all_questions(self) -> List[Dict[str, Any]]:
         """Get all questions from the vector store"""
         try:
-            result = self.collection.get()
-            questions = []
-            for i in range(len(result['ids'])):
-                questions.append({
-                    'id': result['ids'][i],
-                    'text': result['documents'][i],
-                    'metadata': result['metadatas'][i]
-                })
-            return questions
+            return list(self.iter_questions())
         except Exception as e:
             print(f"Error getting questions: {e}")
             return []
@@ -210,12 +825,7 @@ class QuestionVectorStore:
     def clear_questions(self):
         """Clear all questions from the collection"""
         try:
-            self.client.delete_collection(name="japanese_questions")
-            self.collection = self.client.create_collection(
-                name="japanese_questions",
-                metadata={"hnsw:space": "cosine"},
-                embedding_function=self.embedding_function
-            )
+            self.collection = self._create_collection()
             return True
         except Exception as e:
             print(f"Error clearing questions: {e}")
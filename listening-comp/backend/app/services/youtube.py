@@ -1,10 +1,25 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Any
 from youtube_transcript_api import YouTubeTranscriptApi
 import re
+from .transcript_cache import TranscriptCache
 
 class YouTubeTranscriptDownloader:
-    def __init__(self, languages: List[str] = ["ja", "en"]):
+    def __init__(
+        self,
+        languages: List[str] = ["ja", "en"],
+        cache: Optional[TranscriptCache] = None,
+        transcript_api: Any = YouTubeTranscriptApi
+    ):
+        """
+        Args:
+            languages: Preferred transcript languages, in order
+            cache: Optional on-disk cache consulted before fetching
+            transcript_api: Object exposing get_transcript(video_id, languages=...);
+                can be replaced by a local stub in tests
+        """
         self.languages = languages
+        self.cache = cache
+        self.transcript_api = transcript_api
 
     def extract_video_id(self, url: str) -> str:
         """
@@ -23,12 +38,28 @@ class YouTubeTranscriptDownloader:
         
         raise ValueError("Invalid YouTube URL format")
 
-    def get_transcript(self, video_id: str) -> List[Dict]:
+    def get_transcript(self, video_id: str, force_refresh: bool = False) -> List[Dict]:
         """
-        Download YouTube Transcript.
+        Download YouTube Transcript, serving it from the cache when possible.
+
+        Args:
+            video_id: YouTube video ID
+            force_refresh: Skip the cache and fetch the transcript again
         """
+        if self.cache and not force_refresh:
+            transcript = self.cache.get(video_id, self.languages)
+            if transcript is not None:
+                print(f"Transcript cache hit for {video_id}")
+                return transcript
+
         try:
-            transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=self.languages)
-            return transcript
+            transcript = self.transcript_api.get_transcript(video_id, languages=self.languages)
         except Exception as e:
             raise Exception(f"Error fetching transcript: {str(e)}")
+
+        if self.cache:
+            try:
+                self.cache.put(video_id, self.languages, transcript)
+            except Exception as e:
+                print(f"Error caching transcript: {str(e)}")
+        return transcript
@@ -0,0 +1,80 @@
+# Run from the listening-comp directory: python -m pytest backend/tests
+import os
+
+from backend.app.services.ngram_index import NgramIndex
+
+def question(text: str) -> dict:
+    return {"introduction": "", "conversation": text, "question": ""}
+
+def ids(results: list) -> list:
+    return sorted(result["id"] for result in results)
+
+def test_snapshot_and_journal_replay(tmp_path):
+    index = NgramIndex(str(tmp_path))
+    index.add("a", "v1", question("駅で待ち合わせ"))  # first write creates the snapshot
+    index.add("b", "v2", question("駅の前のカフェ"))  # journaled
+    index.close()
+
+    reloaded = NgramIndex(str(tmp_path))
+    assert reloaded.load()
+    assert len(reloaded) == 2
+    assert ids(reloaded.search("駅")) == ["a", "b"]
+    assert ids(reloaded.search("カフェ")) == ["b"]
+
+def test_tombstones_survive_reload_and_compaction(tmp_path):
+    index = NgramIndex(str(tmp_path))
+    index.add_many([
+        ("a", "v1", question("電車が遅れています")),
+        ("b", "v2", question("電車で行きます")),
+    ])
+    index.remove_video("v1")
+    index.add("b", "v2", question("バスで行きます"))  # replacing a document tombstones the old one
+    index.close()
+
+    reloaded = NgramIndex(str(tmp_path))
+    assert reloaded.load()
+    assert reloaded.search("電車") == []
+    assert ids(reloaded.search("バス")) == ["b"]
+
+    reloaded.compact()
+    reloaded.close()
+    compacted = NgramIndex(str(tmp_path))
+    assert compacted.load()
+    assert len(compacted) == 1
+    assert ids(compacted.search("バス")) == ["b"]
+
+def test_writes_after_torn_journal_tail_are_kept(tmp_path):
+    index = NgramIndex(str(tmp_path))
+    index.add("a", "v1", question("雨が降っています"))
+    index.add("b", "v2", question("雨の日は家にいます"))
+    index.close()
+    with open(os.path.join(tmp_path, "journal.jsonl"), "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "id": "c", "vid')  # crash in the middle of a write
+
+    reloaded = NgramIndex(str(tmp_path))
+    assert reloaded.load()
+    assert ids(reloaded.search("雨")) == ["a", "b"]
+    reloaded.add("d", "v3", question("雨のち晴れ"))
+    reloaded.close()
+
+    again = NgramIndex(str(tmp_path))
+    assert again.load()
+    assert ids(again.search("雨")) == ["a", "b", "d"]
+
+def test_single_character_queries_and_limit(tmp_path):
+    index = NgramIndex(str(tmp_path))
+    index.add_many([(f"q{i}", "v1", question(f"{i}番目の駅です")) for i in range(50)])
+    index.add("other", "v2", question("雨です"))
+
+    assert ids(index.search("雨")) == ["other"]
+    assert index.search("駅", limit=3) == index.search("駅", limit=50)[:3]
+    assert len(index.search("駅", limit=3)) == 3
+    assert index.search("空") == []
+
+def test_snapshot_is_not_a_pickle(tmp_path):
+    index = NgramIndex(str(tmp_path))
+    index.add("a", "v1", question("駅で待ち合わせ"))
+    index.close()
+    with open(os.path.join(tmp_path, "snapshot.idx"), "rb") as f:
+        assert not f.read(2).startswith(b"\x80")  # pickle protocol marker
+    assert not os.path.exists(os.path.join(tmp_path, "snapshot.pkl"))
@@ -0,0 +1,60 @@
+# Run from the listening-comp directory: python -m pytest backend/tests
+from backend.app.services import transcript_cache
+from backend.app.services.transcript_cache import TranscriptCache
+from backend.app.services.youtube import YouTubeTranscriptDownloader
+
+SEGMENTS = [
+    {"text": "こんにちは", "start": 0.0, "duration": 1.5},
+    {"text": "駅はどこですか", "start": 1.5, "duration": 2.0},
+]
+
+class StubTranscriptApi:
+    """Stands in for YouTubeTranscriptApi and counts the fetches"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_transcript(self, video_id, languages=None):
+        self.calls.append((video_id, list(languages)))
+        return [dict(segment) for segment in SEGMENTS]
+
+def downloader(tmp_path, api, languages=("ja", "en"), ttl_seconds=None):
+    cache = TranscriptCache(str(tmp_path), ttl_seconds=ttl_seconds)
+    return YouTubeTranscriptDownloader(languages=list(languages), cache=cache, transcript_api=api)
+
+def test_cache_hit_skips_the_api(tmp_path):
+    api = StubTranscriptApi()
+    assert downloader(tmp_path, api).get_transcript("abc") == SEGMENTS
+    # A new downloader reads the cached file, timestamps included
+    assert downloader(tmp_path, api).get_transcript("abc") == SEGMENTS
+    assert api.calls == [("abc", ["ja", "en"])]
+
+def test_expired_entry_is_fetched_again(tmp_path, monkeypatch):
+    api = StubTranscriptApi()
+    now = 1_000_000.0
+    monkeypatch.setattr(transcript_cache.time, "time", lambda: now)
+    youtube = downloader(tmp_path, api, ttl_seconds=60)
+    youtube.get_transcript("abc")
+
+    now += 30
+    youtube.get_transcript("abc")
+    assert len(api.calls) == 1
+
+    now += 31
+    youtube.get_transcript("abc")
+    assert len(api.calls) == 2
+
+def test_force_refresh_bypasses_and_rewrites_the_cache(tmp_path):
+    api = StubTranscriptApi()
+    youtube = downloader(tmp_path, api)
+    youtube.get_transcript("abc")
+    youtube.get_transcript("abc", force_refresh=True)
+    assert len(api.calls) == 2
+    youtube.get_transcript("abc")
+    assert len(api.calls) == 2
+
+def test_entry_for_other_languages_is_not_used(tmp_path):
+    api = StubTranscriptApi()
+    downloader(tmp_path, api, languages=("en",)).get_transcript("abc")
+    downloader(tmp_path, api, languages=("ja", "en")).get_transcript("abc")
+    assert api.calls == [("abc", ["en"]), ("abc", ["ja", "en"])]
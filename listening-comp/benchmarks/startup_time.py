@@ -0,0 +1,74 @@
+"""
+Measure backend cold start.
+
+Run from the listening-comp directory:
+    python benchmarks/startup_time.py [--runs 5] [--port 8765]
+
+Reports, as the median over fresh interpreters:
+  - import time of backend.app.main and which heavy modules it pulled in
+  - time from launching uvicorn until /healthz answers
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+HEAVY_MODULES = ["boto3", "botocore", "chromadb", "openai", "youtube_transcript_api"]
+
+IMPORT_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import backend.app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "heavy_modules": [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+}}))
+"""
+
+def measure_import() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def measure_healthz(port: int, timeout: float = 30.0) -> float:
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"/healthz did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backend cold start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--skip-server", action="store_true", help="Only measure the import")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    print(f"import backend.app.main: median {statistics.median(r['seconds'] for r in imports) * 1000:.0f} ms")
+    print(f"heavy modules imported: {imports[-1]['heavy_modules'] or 'none'}")
+
+    if not args.skip_server:
+        timings = [measure_healthz(args.port) for _ in range(args.runs)]
+        print(f"uvicorn start to first /healthz: median {statistics.median(timings) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
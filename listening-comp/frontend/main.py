@@ -177,27 +177,56 @@ def process_message(message: str):
     with st.chat_message("user", avatar="🧑‍💻"):
         st.markdown(message)
 
-    # Generate and display assistant's response
+    # Generate and display assistant's response, rendering tokens as they stream in
     with st.chat_message("assistant", avatar="🤖"):
-        # Send a POST request to the backend
-        response = requests.post(
-            "http://127.0.0.1:8000/invoke-llm",
-            json={"message": message}  # Sending the message as JSON payload
-        )
-
-        # Check if the response is successful
-        if response.status_code == 200:
-            response_data = response.json()  # Parse the JSON response
-            # Extract the response text from Bedrock's response structure
-            response_text = response_data.get("output", {}).get("message", {}).get("content", [{}])[0].get("text", "")
-            
-            if response_text:
-                st.markdown(response_text)  # Display the response
-                st.session_state.messages.append({"role": "assistant", "content": response_text})
-            else:
-                st.error("Error: Could not extract response text from the model")
+        placeholder = st.empty()
+        response_text = ""
+        try:
+            for chunk in stream_llm_response(message):
+                response_text += chunk
+                placeholder.markdown(response_text + "▌")
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+            return
+
+        if response_text:
+            placeholder.markdown(response_text)  # Display the final response
+            st.session_state.messages.append({"role": "assistant", "content": response_text})
         else:
-            st.error(f"Error: {response.status_code} - {response.text}")
+            st.error("Error: Could not extract response text from the model")
+
+def stream_llm_response(message: str):
+    """
+    Call the backend /invoke-llm/stream endpoint and yield text chunks as they arrive.
+
+    Args:
+        message (str): The user message
+
+    Yields:
+        str: Text deltas from the model
+    """
+    with requests.post(
+        "http://127.0.0.1:8000/invoke-llm/stream",
+        json={"message": message},  # Sending the message as JSON payload
+        stream=True
+    ) as response:
+        if response.status_code != 200:
+            raise Exception(f"{response.status_code} - {response.text}")
+
+        response.encoding = "utf-8"
+        event = "message"
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                event = "message"
+            elif line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                payload = json.loads(line[len("data:"):])
+                if event == "error":
+                    raise Exception(payload.get("detail", "Unknown streaming error"))
+                if event == "done":
+                    return
+                yield payload.get("text", "")
 
 
 
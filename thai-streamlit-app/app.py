@@ -8,10 +8,12 @@ import numpy as np
 from ocr_utils import ThaiOCR
 
 # Initialize OCR
-@st.cache_resource
+@st.cache_resource(show_spinner="Loading the handwriting recognition model...")
 def get_ocr() -> ThaiOCR:
-    """Get or create OCR instance."""
-    return ThaiOCR()
+    """Get or create the OCR instance, warmed up with a dummy inference."""
+    ocr = ThaiOCR()
+    ocr.warm_up()
+    return ocr
 
 def load_thai_chars() -> pd.DataFrame:
     """Load Thai characters from CSV."""
@@ -46,7 +48,8 @@ def initialize_session_state() -> None:
             'stroke_width': 10,
             'confidence_threshold': 0.3,
             'show_target': False,
-            'strict_matching': True
+            'strict_matching': True,
+            'single_char_mode': True
         }
     if 'canvas_key' not in st.session_state:
         st.session_state.canvas_key = 0
@@ -122,6 +125,13 @@ def show_settings() -> None:
     )
     st.session_state.settings['strict_matching'] = strict_matching
     
+    single_char_mode = st.sidebar.checkbox(
+        "Fast Single Character Mode",
+        value=st.session_state.settings['single_char_mode'],
+        help="Recognize the drawing as one character without running the text detector (much faster)."
+    )
+    st.session_state.settings['single_char_mode'] = single_char_mode
+    
     # Practice settings
     st.sidebar.subheader("Practice")
     show_target = st.sidebar.checkbox(
@@ -203,7 +213,13 @@ def show_romanization_to_thai() -> None:
                         
                         # Get OCR prediction
                         ocr = get_ocr()
-                        detected_char, confidence = ocr.process_image(canvas_result.image_data, target_char)
+                        candidates = ocr.process_image_candidates(
+                            canvas_result.image_data,
+                            target_char,
+                            single_char=st.session_state.settings['single_char_mode'],
+                            stroke_width=st.session_state.settings['stroke_width']
+                        )
+                        detected_char, confidence = candidates[0] if candidates else ("", 0.0)
                         
                         # Update confidence in session state
                         st.session_state.current_confidence = confidence
@@ -224,6 +240,10 @@ def show_romanization_to_thai() -> None:
                             st.error(f"Not quite. The correct character is: {target_char}")
                             if detected_char:
                                 st.info(f"OCR detected: {detected_char}")
+                            if len(candidates) > 1:
+                                st.caption("Other candidates: " + ", ".join(
+                                    f"{char} ({score:.0%})" for char, score in candidates[1:]
+                                ))
                     except Exception as e:
                         st.error(f"Error processing character: {str(e)}")
             
@@ -318,5 +338,9 @@ def main() -> None:
     else:
         show_thai_to_romanization()
 
+    # Load and warm up the OCR model once per server, after the page has rendered,
+    # so the first "Check Character" does not wait for it
+    get_ocr()
+
 if __name__ == "__main__":
     main()
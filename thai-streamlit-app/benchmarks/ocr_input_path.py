@@ -0,0 +1,78 @@
+"""
+Benchmark the image hand-off from preprocess_image to easyocr.
+
+Compares the old path (PIL Image -> PNG bytes -> easyocr decodes them) with the
+direct ndarray path used by ThaiOCR.process_image. With --full, also times a
+complete reader.readtext call for both inputs and the single-character
+recognition path that skips the text detector.
+
+Run from the thai-streamlit-app directory:
+    python benchmarks/ocr_input_path.py [--runs 200] [--full]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr_utils import ThaiOCR  # noqa: E402
+from easyocr.utils import reformat_input  # noqa: E402
+
+def synthetic_canvas(size: int = 400, stroke_width: int = 10) -> np.ndarray:
+    """An RGBA canvas like st_canvas returns, with a character-like drawing"""
+    canvas = np.full((size, size, 4), 255, dtype=np.uint8)
+    cv2.ellipse(canvas, (200, 150), (60, 50), 0, 0, 300, (0, 0, 0, 255), stroke_width)
+    cv2.line(canvas, (140, 150), (140, 320), (0, 0, 0, 255), stroke_width)
+    cv2.line(canvas, (260, 150), (260, 320), (0, 0, 0, 255), stroke_width)
+    cv2.circle(canvas, (140, 330), 15, (0, 0, 0, 255), stroke_width)
+    return canvas
+
+def png_round_trip(processed: np.ndarray):
+    image = Image.fromarray(processed.astype('uint8'))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def time_ms(func, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OCR input path benchmark")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--full", action="store_true", help="Also time reader.readtext (loads the model)")
+    args = parser.parse_args()
+
+    ocr = ThaiOCR.__new__(ThaiOCR)  # preprocess_image does not need the model
+    processed = ocr.preprocess_image(synthetic_canvas())
+
+    png_ms = time_ms(lambda: reformat_input(png_round_trip(processed)), args.runs)
+    direct_ms = time_ms(lambda: reformat_input(ThaiOCR.to_reader_input(processed)), args.runs)
+    print(f"hand-off via PNG bytes: {png_ms:.3f} ms (median of {args.runs})")
+    print(f"hand-off via ndarray:   {direct_ms:.3f} ms (median of {args.runs})")
+    print(f"saved per check:        {png_ms - direct_ms:.3f} ms")
+
+    if args.full:
+        ocr = ThaiOCR()
+        runs = max(1, args.runs // 20)
+        ocr.reader.readtext(ThaiOCR.to_reader_input(processed))  # warm up
+        png_ms = time_ms(lambda: ocr.reader.readtext(png_round_trip(processed)), runs)
+        direct_ms = time_ms(lambda: ocr.reader.readtext(ThaiOCR.to_reader_input(processed)), runs)
+        print(f"readtext from PNG bytes: {png_ms:.1f} ms (median of {runs})")
+        print(f"readtext from ndarray:   {direct_ms:.1f} ms (median of {runs})")
+        single_ms = time_ms(lambda: ocr.recognize_single_char(processed, top_k=5), runs)
+        print(f"single-char recognizer:  {single_ms:.1f} ms (median of {runs}, no text detector)")
+
+if __name__ == "__main__":
+    main()
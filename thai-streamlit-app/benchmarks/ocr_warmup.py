@@ -0,0 +1,68 @@
+"""
+Benchmark OCR cold start and warm latency for the CPU inference settings.
+
+Every configuration runs in a fresh Python process, so the model load and the
+first inference are really cold. For each one the script reports the model
+load time, the first single-character check without warm-up, the warm-up time
+and the median warm check.
+
+Run from the thai-streamlit-app directory:
+    python benchmarks/ocr_warmup.py [--runs 20] [--threads 1 2 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def measure(runs: int) -> dict:
+    """Time one configuration in this process; the settings come from the environment"""
+    start = time.perf_counter()
+    from ocr_utils import ThaiOCR
+    from benchmarks.ocr_input_path import synthetic_canvas, time_ms
+
+    ocr = ThaiOCR()
+    load_s = time.perf_counter() - start
+    canvas = synthetic_canvas()
+
+    # A check without process_image_candidates, which would add to the image log
+    def check():
+        return ocr.recognize_single_char(ocr.preprocess_image(canvas), top_k=5)
+
+    start = time.perf_counter()
+    check()
+    first_ms = (time.perf_counter() - start) * 1000
+    warm_up_s = ocr.warm_up()
+    warm_ms = time_ms(check, runs)
+    return {"load_s": load_s, "first_ms": first_ms, "warm_up_s": warm_up_s, "warm_ms": warm_ms}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OCR warm-up benchmark")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--threads", type=int, nargs="+", default=[0])
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.runs)))
+        return
+
+    for quantize in ("1", "0"):
+        for threads in args.threads:
+            env = dict(os.environ, THAI_OCR_QUANTIZE=quantize, THAI_OCR_NUM_THREADS=str(threads))
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", "--runs", str(args.runs)],
+                env=env, capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"quantize={quantize} threads={threads or 'default'}: "
+                f"load {result['load_s']:.2f}s, first check {result['first_ms']:.0f} ms, "
+                f"warm-up {result['warm_up_s']:.2f}s, warm check {result['warm_ms']:.0f} ms"
+            )
+
+if __name__ == "__main__":
+    main()
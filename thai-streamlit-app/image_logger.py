@@ -0,0 +1,204 @@
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import cv2
+import os
+import sys
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import atexit
+import logging
+
+class ImageLogger:
+    """
+    Background writer for OCR practice images.
+
+    log() only puts the image on a bounded queue and returns immediately; a writer
+    thread PNG-encodes queued images and inserts them into an append-only SQLite
+    blob store in batches, so the OCR check never waits for the disk. When the
+    queue is full the newest (or, with drop_policy="drop_oldest", the oldest)
+    image is dropped and counted instead of blocking.
+    """
+
+    _SENTINEL = object()
+
+    def __init__(
+        self,
+        db_path: str,
+        queue_size: int = 256,
+        batch_size: int = 32,
+        flush_interval: float = 1.0,
+        drop_policy: str = "drop_newest"
+    ):
+        """
+        Args:
+            db_path: SQLite file holding the images
+            queue_size: Maximum number of images waiting to be written
+            batch_size: Maximum number of images per insert transaction
+            flush_interval: Seconds to wait for more images before writing a partial batch
+            drop_policy: "drop_newest" or "drop_oldest" when the queue is full
+        """
+        if drop_policy not in ("drop_newest", "drop_oldest"):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS image_logs (
+                    id TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    target_char TEXT NOT NULL,
+                    detected_char TEXT,
+                    confidence REAL NOT NULL,
+                    png BLOB NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS image_logs_target ON image_logs (target_char)")
+
+        self._thread = threading.Thread(target=self._run, name="image-logger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def log(
+        self,
+        image: np.ndarray,
+        target_char: str,
+        confidence: float,
+        detected_char: Optional[str] = None
+    ) -> str:
+        """
+        Queue an image for writing without blocking.
+
+        Args:
+            image: Grayscale or RGB(A) image array; it must not be modified afterwards
+            target_char: The target Thai character
+            confidence: Recognition confidence
+            detected_char: The recognized character, if any
+
+        Returns:
+            str: Collision-free id of the record, or "" if the image was dropped
+        """
+        record_id = f"{time.strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:12]}"
+        item = (record_id, time.time(), target_char, detected_char, float(confidence), image)
+        with self._lock:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self.dropped += 1
+                if self.drop_policy == "drop_newest":
+                    logging.warning(f"Image log queue full, dropped image for {target_char}")
+                    return ""
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self._queue.put_nowait(item)
+            self.queued += 1
+        return record_id
+
+    def _next_batch(self) -> Tuple[List[tuple], bool]:
+        """Collect up to batch_size items, waiting at most flush_interval after the first one"""
+        item = self._queue.get()
+        if item is self._SENTINEL:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is self._SENTINEL:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        conn = self._connect()
+        try:
+            done = False
+            while not done:
+                batch, done = self._next_batch()
+                if not batch:
+                    continue
+                rows = []
+                for record_id, created_at, target_char, detected_char, confidence, image in batch:
+                    ok, png = cv2.imencode(".png", image)
+                    if ok:
+                        rows.append((record_id, created_at, target_char, detected_char, confidence, png.tobytes()))
+                try:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO image_logs (id, created_at, target_char, detected_char, confidence, png) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            rows
+                        )
+                    self.written += len(rows)
+                except sqlite3.Error as e:
+                    logging.error(f"Error writing {len(rows)} logged images: {str(e)}")
+        finally:
+            conn.close()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write everything still queued and stop the writer thread"""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(self._SENTINEL)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "pending": self._queue.qsize()
+        }
+
+def export_images(db_path: str, out_dir: str, target_char: Optional[str] = None) -> int:
+    """
+    Write logged images back out as PNG files named {target}-{confidence}-{id}.png.
+
+    Returns:
+        int: Number of files written
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        query = "SELECT id, target_char, confidence, png FROM image_logs"
+        params: tuple = ()
+        if target_char:
+            query += " WHERE target_char = ?"
+            params = (target_char,)
+        count = 0
+        for record_id, char, confidence, png in conn.execute(query, params):
+            with open(os.path.join(out_dir, f"{char}-{confidence:.2f}-{record_id}.png"), "wb") as f:
+                f.write(png)
+            count += 1
+        return count
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    # python image_logger.py image-logs/ocr-images.sqlite3 exported-images [target_char]
+    if len(sys.argv) < 3:
+        raise SystemExit("Usage: python image_logger.py DB_PATH OUT_DIR [TARGET_CHAR]")
+    print(f"Exported {export_images(sys.argv[1], sys.argv[2], *sys.argv[3:4])} images")
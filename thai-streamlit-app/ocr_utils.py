@@ -1,15 +1,17 @@
 # /mnt/c/Users/lviva/Documents/TRAINING/AI/GenAI_Bootcamp/free-genai-bootcamp-2025/thai-streamlit-app/ocr_utils.py
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 import easyocr
+from easyocr.config import imgH as RECOGNIZER_HEIGHT
 import numpy as np
 from PIL import Image
-import io
 import torch
 import streamlit as st
 import cv2
 import os
 import logging
-from datetime import datetime
+import math
+import time
+from image_logger import ImageLogger
 
 # Configure logging
 logging.basicConfig(
@@ -18,6 +20,28 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
+# SQLite blob store for practice images, inside the image logs directory
+IMAGE_LOG_DB = 'ocr-images.sqlite3'
+
+# Preprocessing: output size and margin in pixels, stroke width the output is
+# normalized to, and the smallest components (absolute, and relative to the
+# largest one) that count as part of the character
+PREPROCESS_SIZE = 200
+PREPROCESS_MARGIN = 20
+DEFAULT_STROKE_WIDTH = 10
+TARGET_STROKE_WIDTH = 12
+MIN_COMPONENT_AREA = 20
+MIN_COMPONENT_FRACTION = 0.02
+
+# CPU inference settings, read once at import (the OCR instance is a singleton):
+# THAI_OCR_QUANTIZE=0 turns off easyocr's int8 dynamic quantization of the
+# detector and recognizer LSTM/Linear layers, THAI_OCR_NUM_THREADS caps the
+# PyTorch intra-op threads (0 keeps PyTorch's default), and THAI_OCR_MODEL_DIR
+# points easyocr at pre-downloaded models so the first start does not download
+OCR_QUANTIZE = os.getenv('THAI_OCR_QUANTIZE', '1') != '0'
+OCR_NUM_THREADS = int(os.getenv('THAI_OCR_NUM_THREADS', '0'))
+OCR_MODEL_DIR = os.getenv('THAI_OCR_MODEL_DIR') or None
+
 class ThaiOCR:
     _instance = None
     
@@ -37,148 +61,327 @@ class ThaiOCR:
             # Set CUDA device if available
             if torch.cuda.is_available():
                 torch.cuda.set_device(0)
+            elif OCR_NUM_THREADS > 0:
+                torch.set_num_threads(OCR_NUM_THREADS)
             
-            self.reader = easyocr.Reader(['th'], gpu=torch.cuda.is_available())
+            # quantize only applies on CPU; easyocr ignores it on GPU
+            self.reader = easyocr.Reader(
+                ['th'],
+                gpu=torch.cuda.is_available(),
+                model_storage_directory=OCR_MODEL_DIR,
+                quantize=OCR_QUANTIZE
+            )
+            self.warmed_up = False
             self._initialized = True
+            self.direct_recognizer = self._check_direct_recognizer()
+            logging.info(
+                f"OCR model loaded on {self.reader.device} "
+                f"(quantized: {OCR_QUANTIZE and self.reader.device == 'cpu'}, threads: {torch.get_num_threads()})"
+            )
             
             # Create image logs directory if it doesn't exist
             self.image_logs_dir = 'image-logs'
             os.makedirs(self.image_logs_dir, exist_ok=True)
             logging.info(f"Image logs directory: {os.path.abspath(self.image_logs_dir)}")
             
+            # Images are written by a background thread so checks never wait for the disk
+            self.image_logger = ImageLogger(os.path.join(self.image_logs_dir, IMAGE_LOG_DB))
+            
         except Exception as e:
             st.error(f"Error initializing OCR: {str(e)}")
             self.reader = None
             self._initialized = False
     
-    def save_image(self, image: Image.Image, target_char: str, confidence: float) -> str:
+    def warm_up(self) -> float:
+        """
+        Run dummy inferences so the first real check does not pay PyTorch's
+        first-call overhead (allocator growth, kernel selection, lazy init).
+        
+        Both the recognizer-only path and the full readtext path are run, since
+        they use different networks.
+        
+        Returns:
+            float: Seconds spent warming up, 0.0 if already warm or not initialized
+        """
+        if not self._initialized or self.reader is None or self.warmed_up:
+            return 0.0
+        start = time.perf_counter()
+        try:
+            canvas = np.full((PREPROCESS_SIZE, PREPROCESS_SIZE), 255, dtype=np.uint8)
+            cv2.circle(canvas, (PREPROCESS_SIZE // 2, PREPROCESS_SIZE // 2), PREPROCESS_SIZE // 4, 0, TARGET_STROKE_WIDTH)
+            self.recognize_single_char(canvas, top_k=1)
+            self.reader.readtext(canvas)
+            self.warmed_up = True
+        except Exception as e:
+            logging.warning(f"OCR warm-up failed: {str(e)}")
+        elapsed = time.perf_counter() - start
+        logging.info(f"OCR warm-up took {elapsed:.2f}s")
+        return elapsed
+    
+    def save_image(
+        self,
+        image: np.ndarray,
+        target_char: str,
+        confidence: float,
+        detected_char: Optional[str] = None
+    ) -> str:
         """
-        Save the image to the logs directory with character and confidence in filename.
+        Queue the image for the image log store (see ImageLogger) without blocking.
         
         Args:
-            image: PIL Image to save
+            image: Image array to save; it must not be modified afterwards
             target_char: The target Thai character
             confidence: Recognition confidence
+            detected_char: The recognized character, if any
             
         Returns:
-            str: Path to the saved image
+            str: Id of the logged image, or "" if it was dropped
         """
         try:
-            # Create filename with timestamp to ensure uniqueness
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{target_char}-{confidence:.2f}-{timestamp}.png"
-            filepath = os.path.join(self.image_logs_dir, filename)
-            
-            # Save the image
-            image.save(filepath)
-            logging.info(f"Saved image to: {os.path.abspath(filepath)}")
-            
-            return filepath
+            return self.image_logger.log(image, target_char, confidence, detected_char)
         except Exception as e:
             logging.error(f"Error saving image: {str(e)}")
             return ""
     
-    def preprocess_image(self, image_data: np.ndarray) -> np.ndarray:
+    def preprocess_image(self, image_data: np.ndarray, stroke_width: int = DEFAULT_STROKE_WIDTH) -> np.ndarray:
         """
         Preprocess the image for better OCR recognition.
         
+        Ink is separated from the (white or transparent) canvas background and all
+        significant connected components are kept, so detached parts of a glyph such
+        as the loops and tails of ฐ or ญ stay in the crop. The crop is scaled into a
+        square output keeping its aspect ratio, strokes are thickened or thinned to a
+        fixed width relative to the canvas stroke_width, and the glyph is centred on
+        its centre of mass. All steps are whole-array OpenCV/NumPy operations.
+        
         Args:
             image_data: Raw image data from canvas
+            stroke_width: Pen width the drawing was made with, in canvas pixels
             
         Returns:
-            Preprocessed image data
+            Preprocessed image data: black strokes on white, PREPROCESS_SIZE square;
+            all white if nothing was drawn
         """
-        # Convert to grayscale
-        if len(image_data.shape) > 2:
-            gray = cv2.cvtColor(image_data, cv2.COLOR_RGB2GRAY)
+        # Ink mask: dark pixels, and only opaque ones when there is an alpha channel
+        if image_data.ndim > 2:
+            gray = cv2.cvtColor(image_data, cv2.COLOR_RGBA2GRAY if image_data.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+            mask = cv2.compare(gray, 128, cv2.CMP_LT)
+            if image_data.shape[2] == 4:
+                mask = cv2.bitwise_and(mask, cv2.compare(image_data[:, :, 3], 127, cv2.CMP_GT))
         else:
-            gray = image_data
-            
-        # Apply thresholding to get binary image
-        _, binary = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)
+            mask = cv2.compare(image_data.astype(np.uint8), 128, cv2.CMP_LT)
         
-        # Find contours
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        size = PREPROCESS_SIZE
+        blank = np.full((size, size), 255, dtype=np.uint8)
         
-        if not contours:
-            return image_data
+        # Union bounding box of all significant components (specks are ignored).
+        # Components are labelled on a half-resolution mask, which is enough for a
+        # bounding box; INTER_AREA keeps every inked pixel nonzero.
+        half = cv2.resize(mask, (mask.shape[1] // 2, mask.shape[0] // 2), interpolation=cv2.INTER_AREA)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(half, connectivity=8, ltype=cv2.CV_16U)
+        if count <= 1:
+            return blank
+        stats = stats[1:] * 2
+        areas = stats[:, cv2.CC_STAT_AREA] * 2  # stats were doubled, area scales by 4
+        keep = stats[areas >= max(MIN_COMPONENT_AREA, MIN_COMPONENT_FRACTION * areas.max())]
+        if not len(keep):
+            return blank
+        x0 = keep[:, cv2.CC_STAT_LEFT].min()
+        y0 = keep[:, cv2.CC_STAT_TOP].min()
+        x1 = min(mask.shape[1], (keep[:, cv2.CC_STAT_LEFT] + keep[:, cv2.CC_STAT_WIDTH]).max() + 1)
+        y1 = min(mask.shape[0], (keep[:, cv2.CC_STAT_TOP] + keep[:, cv2.CC_STAT_HEIGHT]).max() + 1)
+        cropped = mask[y0:y1, x0:x1]
+        if not cropped.any():
+            return blank
+        
+        # Scale into the output box, keeping the aspect ratio
+        h, w = cropped.shape
+        inner = size - 2 * PREPROCESS_MARGIN
+        scale = inner / max(h, w)
+        new_w, new_h = max(1, round(w * scale)), max(1, round(h * scale))
+        glyph = cv2.resize(cropped, (new_w, new_h), interpolation=cv2.INTER_AREA)
+        
+        # Normalize the stroke width: after scaling, strokes are stroke_width * scale wide
+        delta = round(TARGET_STROKE_WIDTH - stroke_width * scale)
+        if delta:
+            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (abs(delta) + 1, abs(delta) + 1))
+            if delta > 0:
+                glyph = cv2.dilate(glyph, kernel)
+            elif stroke_width * scale + delta >= 2:
+                glyph = cv2.erode(glyph, kernel)
+        _, glyph = cv2.threshold(glyph, 127, 255, cv2.THRESH_BINARY)
+        
+        # Centre by mass, clamped so the glyph stays inside the output
+        moments = cv2.moments(glyph, binaryImage=True)
+        if moments["m00"]:
+            cx, cy = moments["m10"] / moments["m00"], moments["m01"] / moments["m00"]
+        else:
+            cx, cy = new_w / 2, new_h / 2
+        left = int(np.clip(round(size / 2 - cx), 0, size - new_w))
+        top = int(np.clip(round(size / 2 - cy), 0, size - new_h))
+        
+        output = blank
+        output[top:top + new_h, left:left + new_w] = 255 - glyph
+        return output
+    
+    @staticmethod
+    def to_reader_input(processed_image: np.ndarray) -> np.ndarray:
+        """
+        Prepare a preprocessed image for reader.readtext without a PNG round trip.
+        
+        easyocr accepts numpy arrays directly; a 2-D uint8 array is used as the
+        grayscale image as is. This only copies when the array is not already
+        C-contiguous uint8.
+        
+        Args:
+            processed_image: Output of preprocess_image
             
-        # Find the main character contour (largest one)
-        main_contour = max(contours, key=cv2.contourArea)
+        Returns:
+            C-contiguous uint8 array
+        """
+        return np.ascontiguousarray(processed_image, dtype=np.uint8)
+    
+    def _recognizer_topk(self, gray: np.ndarray, top_k: int) -> List[Tuple[str, float]]:
+        """
+        Run easyocr's recognition network once on the whole glyph and rank characters.
         
-        # Get bounding box
-        x, y, w, h = cv2.boundingRect(main_contour)
+        The image is resized and normalized the way easyocr's AlignCollate does it
+        (height imgH, aspect ratio kept, values in [-1, 1]). Each character is scored
+        by its highest softmax probability over the CTC time steps, blank excluded.
+        """
+        h, w = gray.shape
+        img_h = RECOGNIZER_HEIGHT
+        new_w = max(1, int(math.ceil(img_h * w / h)))
+        resized = np.asarray(Image.fromarray(gray).resize((new_w, img_h), Image.BICUBIC), dtype=np.float32)
+        tensor = torch.from_numpy(resized).div_(255.0).sub_(0.5).div_(0.5)[None, None]
         
-        # Add padding
-        padding = 20
-        x = max(0, x - padding)
-        y = max(0, y - padding)
-        w = min(binary.shape[1] - x, w + 2 * padding)
-        h = min(binary.shape[0] - y, h + 2 * padding)
+        with torch.inference_mode():
+            preds = self.reader.recognizer(tensor.to(self.reader.device), None)
+            probs = torch.softmax(preds, dim=2)[0]
+            char_scores = probs[:, 1:].max(dim=0).values
+            scores, indices = torch.topk(char_scores, min(top_k, char_scores.shape[0]))
         
-        # Crop to the character
-        cropped = binary[y:y+h, x:x+w]
+        characters = self.reader.converter.character
+        return [(characters[i + 1], float(score)) for score, i in zip(scores.tolist(), indices.tolist())]
+    
+    def _check_direct_recognizer(self) -> bool:
+        """
+        Check once that _recognizer_topk works with the installed easyocr.
         
-        # Resize to a standard size
-        target_size = (200, 200)
-        resized = cv2.resize(cropped, target_size, interpolation=cv2.INTER_AREA)
+        The direct call depends on easyocr internals (recognizer, converter, imgH).
+        If they changed, the failure is logged once with its traceback and
+        recognize_single_char uses reader.recognize, which only gives the top candidate.
         
-        return resized
+        Returns:
+            bool: True if the direct recognizer path returned candidates
+        """
+        probe = np.full((RECOGNIZER_HEIGHT, RECOGNIZER_HEIGHT), 255, dtype=np.uint8)
+        cv2.circle(probe, (RECOGNIZER_HEIGHT // 2, RECOGNIZER_HEIGHT // 2), RECOGNIZER_HEIGHT // 4, 0, 4)
+        try:
+            candidates = self._recognizer_topk(probe, top_k=2)
+        except Exception:
+            logging.exception("Direct recognizer path unavailable, single character mode will return the top candidate only")
+            return False
+        if len(candidates) != 2 or not all(isinstance(char, str) and char for char, _ in candidates):
+            logging.error(f"Direct recognizer path returned unexpected candidates {candidates!r}, using reader.recognize")
+            return False
+        return True
     
-    def process_image(self, image_data: np.ndarray, target_char: str) -> Tuple[str, float]:
+    def recognize_single_char(self, processed_image: np.ndarray, top_k: int = 5) -> List[Tuple[str, float]]:
         """
-        Process the image and return the recognized Thai character.
+        Recognize a single drawn glyph without running the CRAFT text detector.
+        
+        preprocess_image has already cropped the drawing to the character, so the
+        whole image is one text box and only the recognizer is needed.
+        
+        Args:
+            processed_image: Output of preprocess_image
+            top_k: Number of candidates to return
+            
+        Returns:
+            list: (character, score) candidates, best first
+        """
+        gray = self.to_reader_input(processed_image)
+        if gray.ndim > 2:
+            gray = cv2.cvtColor(gray, cv2.COLOR_RGB2GRAY)
+        if self.direct_recognizer:
+            return self._recognizer_topk(gray, top_k)
+        # reader.recognize is the public equivalent of the direct call (top 1 only)
+        h, w = gray.shape
+        results = self.reader.recognize(gray, horizontal_list=[[0, w, 0, h]], free_list=[], detail=1)
+        return [(results[0][1][:1], float(results[0][2]))] if results and results[0][1] else []
+    
+    def process_image_candidates(
+        self,
+        image_data: np.ndarray,
+        target_char: str,
+        single_char: bool = True,
+        top_k: int = 5,
+        stroke_width: int = DEFAULT_STROKE_WIDTH
+    ) -> List[Tuple[str, float]]:
+        """
+        Process the image and return candidate Thai characters with confidence scores.
         
         Args:
             image_data: numpy array of the image
             target_char: The target Thai character for logging
+            single_char: Use the recognition-only fast path instead of reader.readtext
+            top_k: Number of candidates in single-character mode
+            stroke_width: Pen width of the drawing, used to normalize strokes
             
         Returns:
-            tuple: (recognized character, confidence score)
+            list: (character, confidence) candidates, best first; empty if nothing was recognized
         """
         if not self._initialized or self.reader is None:
-            return "", 0.0
+            return []
             
         try:
             # Preprocess the image
-            processed_image = self.preprocess_image(image_data)
+            processed_image = self.preprocess_image(image_data, stroke_width)
             
-            # Convert to PIL Image
-            image = Image.fromarray(processed_image.astype('uint8'))
+            # Nothing drawn: no need to run the model
+            if processed_image.min() == 255:
+                return []
             
-            # Convert to bytes
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='PNG')
-            img_byte_arr = img_byte_arr.getvalue()
-            
-            # Get OCR results
-            results = self.reader.readtext(img_byte_arr)
-            
-            if not results:
-                confidence = 0.0
-                text = ""
+            if single_char:
+                candidates = self.recognize_single_char(processed_image, top_k)
             else:
-                # Get the first result with highest confidence
-                text = results[0][1]  # Get the recognized text
-                confidence = float(results[0][2])  # Get the confidence score
+                # Get OCR results, passing the array straight to easyocr
+                results = self.reader.readtext(self.to_reader_input(processed_image))
                 
-                # If multiple characters were detected, take only the first one
-                if len(text) > 1:
-                    text = text[0]
-                
-                # Ensure confidence is between 0 and 1
-                confidence = max(0.0, min(1.0, confidence))
+                # Take the first character of the first result
+                candidates = [(results[0][1][:1], float(results[0][2]))] if results and results[0][1] else []
+            
+            # Ensure confidence is between 0 and 1
+            candidates = [(text, max(0.0, min(1.0, confidence))) for text, confidence in candidates]
+            confidence = candidates[0][1] if candidates else 0.0
             
             # Save the image and log the results
-            image_path = self.save_image(image, target_char, confidence)
-            logging.info(f"OCR Log - Path: {image_path}, Target: {target_char}, Confidence: {confidence:.2f}")
+            detected_char = candidates[0][0] if candidates else None
+            image_id = self.save_image(processed_image, target_char, confidence, detected_char)
+            logging.info(f"OCR Log - Image: {image_id}, Target: {target_char}, Confidence: {confidence:.2f}")
                 
-            return text, confidence
+            return candidates
             
         except Exception as e:
             st.error(f"Error processing image: {str(e)}")
             logging.error(f"OCR Error - Target: {target_char}, Error: {str(e)}")
-            return "", 0.0
+            return []
+    
+    def process_image(self, image_data: np.ndarray, target_char: str, single_char: bool = True) -> Tuple[str, float]:
+        """
+        Process the image and return the recognized Thai character.
+        
+        Args:
+            image_data: numpy array of the image
+            target_char: The target Thai character for logging
+            single_char: Use the recognition-only fast path instead of reader.readtext
+            
+        Returns:
+            tuple: (recognized character, confidence score)
+        """
+        candidates = self.process_image_candidates(image_data, target_char, single_char, top_k=1)
+        return candidates[0] if candidates else ("", 0.0)
 
     def compare_characters(self, detected_char: str, target_char: str, strict: bool = True) -> bool:
         """